@@ -7,103 +7,293 @@ import logging
 import random
 import json
 from os import path
-from io import StringIO
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.common.exceptions import (
-    TimeoutException,
-    NoSuchElementException,
-    WebDriverException,
-)
 import shutil
-from urllib.parse import urlparse
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# 配置日志
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-
-formatter = logging.Formatter(
-    "[%(asctime)s %(levelname)s] %(message)s", datefmt="%H:%M:%S"
-)
-
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-
-# 解析账户配置
-accounts = []
-
-# 首先处理 DISCOURSE_USER
-discourse_user = os.getenv("DISCOURSE_USER", "").strip()
-if discourse_user:
-    parts = discourse_user.split()
-    if len(parts) == 3:
-        forum_url, username, password = parts
-        if not forum_url.startswith(('http://', 'https://')):
-            forum_url = f'https://{forum_url}'
-        domain = urlparse(forum_url).netloc
-        view_count = int(os.getenv("VIEW_COUNT", "1000"))
-        scroll_duration = int(os.getenv("SCROLL_DURATION", "5"))
-        accounts.append({
-            'forum_url': forum_url,
-            'username': username,
-            'password': password,
-            'domain': domain,
-            'view_count': view_count,
-            'scroll_duration': scroll_duration
-        })
-
-# 然后处理 DISCOURSE_USER_1, DISCOURSE_USER_2 等
-index = 1
-while True:
-    env_name = f"DISCOURSE_USER_{index}"
-    user_data = os.getenv(env_name, "").strip()
-    if not user_data:  # 如果找不到环境变量，退出循环
-        break
-
-    parts = user_data.split()
-    if len(parts) == 3:
-        forum_url, username, password = parts
-        if not forum_url.startswith(('http://', 'https://')):
-            forum_url = f'https://{forum_url}'
-        domain = urlparse(forum_url).netloc
-        view_count = int(os.getenv(f"VIEW_COUNT_{index}", "1000"))
-        scroll_duration = int(os.getenv(f"SCROLL_DURATION_{index}", "5"))
-        accounts.append({
-            'forum_url': forum_url,
-            'username': username,
-            'password': password,
-            'domain': domain,
-            'view_count': view_count,
-            'scroll_duration': scroll_duration
-        })
-    index += 1
-
-if not accounts:
-    logging.error("❌ 未找到有效的账户配置")
-    exit(1)
-
-logging.info(f"✅ 成功解析 {len(accounts)} 个账户配置")
-for acc in accounts:
-    logging.info(f"   📍 {acc['domain']} - {acc['username']}")
-
-browse_count = 0
-connect_info = ""
-like_count = 0
-account_info = []
+import sys
+import argparse
+import functools
+import hashlib
+import sqlite3
+import tempfile
+import copy
+import socket
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from typing import Optional, Tuple
+from urllib.parse import quote, urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows：没有 flock，不启用共享磁盘缓存
+    fcntl = None
+
+# Selenium 和 requests 只在真正需要浏览器或 HTTP 请求时才导入，
+# 这样 --check / --plan 以及配置错误时可以在毫秒级完成。
+
+
+def setup_logging():
+    """配置日志（可重复调用）"""
+    logger = logging.getLogger()
+    if getattr(logger, '_discourse_alive_configured', False):
+        return
+    logger.setLevel(logging.INFO)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+
+    formatter = logging.Formatter(
+        "[%(asctime)s %(levelname)s] %(message)s", datefmt="%H:%M:%S"
+    )
+
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+    logger._discourse_alive_configured = True
+
+
+# 资源拦截预设：通过 CDP Network.setBlockedURLs 拦截的 URL 模式
+MEDIA_PATTERNS = [
+    '*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.ico*',
+    '*.mp4*', '*.webm*', '*.mp3*', '*.m4a*',
+    '*/user_avatar/*', '*/letter_avatar*', '*/images/emoji/*',
+]
+RESOURCE_PROFILES = {
+    'full': [],
+    'no-media': MEDIA_PATTERNS,
+    'minimal': MEDIA_PATTERNS + [
+        '*.woff*', '*.ttf*', '*.otf*', '*.eot*',
+        '*youtube.com/*', '*ytimg.com/*', '*twitter.com/*', '*twimg.com/*',
+        '*google-analytics.com/*', '*googletagmanager.com/*', '*doubleclick.net/*',
+    ],
+}
+
+DISCOVERY_MODES = ('api', 'scroll')
+# full：每个帖子在新标签页完整加载；spa：在同一个标签页内通过 Discourse 前端路由切换
+NAVIGATION_MODES = ('full', 'spa')
+
+# 未在 daily_requirements.json 中配置的域名使用的每日目标
+DEFAULT_DAILY_REQUIREMENTS = {
+    'daily_views': 50,
+    'daily_time': 180
+}
+
+# 帖子列表已到底后，连续多少批次没有可浏览的新帖子就放弃当前账号
+MAX_EMPTY_BATCHES = 3
+
+
+@dataclass(frozen=True)
+class AccountConfig:
+    env_name: str
+    forum_url: str
+    username: str
+    password: str = field(repr=False)
+    domain: str
+    view_count: int = 1000
+    scroll_duration: int = 5
+    discovery: str = 'api'
+    resource_profile: str = 'full'
+    navigation: str = 'full'
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    accounts: Tuple[AccountConfig, ...]
+    errors: Tuple[str, ...] = ()
+    # 并发执行的账户数（每个账户在独立进程中运行），默认逐个执行
+    max_workers: int = 1
+    # 浏览器复用：同一个 Chrome 最多服务的账户数，以及是否在后台预启动下一个浏览器
+    driver_max_uses: int = 5
+    driver_prelaunch: bool = True
+    # 会话缓存：保存登录后的 Cookie，有效期内跳过登录流程（设为0禁用）
+    session_cache_dir: str = ".session_cache"
+    session_cache_hours: float = 72
+    # 本地状态数据库（已浏览帖子索引等）及记录保留天数
+    state_db: str = ".discourse_alive.db"
+    seen_retention_days: int = 30
+    # 阅读当前帖子时在后台标签页预加载下一个帖子
+    topic_prefetch: bool = True
+    # 同一域名的帖子列表在账号和并发进程之间共享的有效期（秒，设为0禁用）
+    listing_cache_seconds: int = 300
+    # 运行结束后写出 JSON 报告和 Prometheus textfile 的目录（留空则不写出）
+    metrics_dir: str = "metrics"
+    # 内存看门狗：Chrome 进程树 RSS 或页面 JS 堆超过上限（MB）时换用新浏览器继续（设为0禁用）
+    memory_limit_mb: int = 1536
+    js_heap_limit_mb: int = 512
+    # 按域名共享的 Chrome 磁盘缓存目录（留空禁用）及每个域名的缓存上限（MB）
+    browser_cache_dir: str = ""
+    browser_cache_mb: int = 200
+    # 多机共享的任务队列（SQLite 文件路径，留空则只运行本机配置的账户）及租约时长（秒）
+    work_queue: str = ""
+    queue_lease_seconds: int = 300
+    # 熔断：连续多少个帖子处理失败后停止当前账号并跳过同域名的其他账号（设为0禁用）
+    max_consecutive_failures: int = 5
+    # 运行时间窗口：截止时刻（HH:MM）和/或从启动起的分钟数，留空或0表示不限
+    run_deadline: str = ""
+    run_budget_minutes: float = 0
+    # 性能剖析（由命令行 --profile 设置）：commands 只追踪 WebDriver 命令，full 同时启用 cProfile 和 tracemalloc
+    profile: str = ""
+
+
+class _EnvReader:
+    """Read typed values from the environment, collecting errors instead of raising"""
+
+    def __init__(self):
+        self.errors = []
+
+    def str(self, name, default):
+        return os.getenv(name, default).strip()
+
+    def int(self, name, default, minimum=None):
+        raw = os.getenv(name, "").strip()
+        if not raw:
+            return default
+        try:
+            value = int(raw)
+        except ValueError:
+            self.errors.append(f"{name}={raw} 不是整数")
+            return default
+        if minimum is not None and value < minimum:
+            self.errors.append(f"{name}={raw} 不能小于 {minimum}")
+            return default
+        return value
+
+    def float(self, name, default, minimum=None):
+        raw = os.getenv(name, "").strip()
+        if not raw:
+            return default
+        try:
+            value = float(raw)
+        except ValueError:
+            self.errors.append(f"{name}={raw} 不是数字")
+            return default
+        if minimum is not None and value < minimum:
+            self.errors.append(f"{name}={raw} 不能小于 {minimum}")
+            return default
+        return value
+
+    def bool(self, name, default):
+        raw = os.getenv(name, "").strip().lower()
+        if not raw:
+            return default
+        return raw not in ("0", "false", "no", "off")
+
+    def clock(self, name):
+        value = self.str(name, "")
+        if not value:
+            return ""
+        try:
+            hour, minute = (int(part) for part in value.split(':'))
+        except ValueError:
+            hour = minute = -1
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            self.errors.append(f"{name}={value} 格式应为 HH:MM")
+            return ""
+        return f"{hour:02d}:{minute:02d}"
+
+    def choice(self, name, default, choices):
+        value = self.str(name, default).lower()
+        if value not in choices:
+            self.errors.append(f"{name}={value} 无效，可选值：{', '.join(choices)}")
+            return default
+        return value
+
+
+def _parse_account(env, env_name, suffix):
+    parts = env.str(env_name, "").split()
+    if len(parts) != 3:
+        env.errors.append(f"{env_name} 格式应为：论坛地址 用户名 密码")
+        return None
+
+    forum_url, username, password = parts
+    if not forum_url.startswith(('http://', 'https://')):
+        forum_url = f'https://{forum_url}'
+    domain = urlparse(forum_url).netloc
+    if not domain:
+        env.errors.append(f"{env_name} 的论坛地址无效：{forum_url}")
+        return None
+
+    return AccountConfig(
+        env_name=env_name,
+        forum_url=forum_url,
+        username=username,
+        password=password,
+        domain=domain,
+        view_count=env.int(f"VIEW_COUNT{suffix}", 1000, minimum=0),
+        scroll_duration=env.int(f"SCROLL_DURATION{suffix}", 5, minimum=1),
+        discovery=env.choice(f"DISCOVERY{suffix}", 'api', DISCOVERY_MODES),
+        resource_profile=env.choice(f"RESOURCE_PROFILE{suffix}", 'full', tuple(RESOURCE_PROFILES)),
+        navigation=env.choice(f"NAVIGATION{suffix}", 'full', NAVIGATION_MODES),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_config():
+    """Parse and validate the environment once per process"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    env = _EnvReader()
+    accounts = []
+
+    # 首先处理 DISCOURSE_USER，然后处理 DISCOURSE_USER_1, DISCOURSE_USER_2 等
+    if env.str("DISCOURSE_USER", ""):
+        accounts.append(_parse_account(env, "DISCOURSE_USER", ""))
+    index = 1
+    while env.str(f"DISCOURSE_USER_{index}", ""):
+        accounts.append(_parse_account(env, f"DISCOURSE_USER_{index}", f"_{index}"))
+        index += 1
+    accounts = tuple(account for account in accounts if account is not None)
+
+    # 队列模式下的工作节点从队列领取账户，本机可以不配置账户
+    if not accounts and not env.str("WORK_QUEUE", ""):
+        env.errors.append("未找到有效的账户配置")
+
+    return AppConfig(
+        accounts=accounts,
+        max_workers=env.int("MAX_WORKERS", 1, minimum=1),
+        driver_max_uses=env.int("DRIVER_MAX_USES", 5, minimum=1),
+        driver_prelaunch=env.bool("DRIVER_PRELAUNCH", True),
+        session_cache_dir=env.str("SESSION_CACHE_DIR", ".session_cache"),
+        session_cache_hours=env.float("SESSION_CACHE_HOURS", 72, minimum=0),
+        state_db=env.str("STATE_DB", ".discourse_alive.db"),
+        seen_retention_days=env.int("SEEN_RETENTION_DAYS", 30, minimum=0),
+        topic_prefetch=env.bool("TOPIC_PREFETCH", True),
+        listing_cache_seconds=env.int("LISTING_CACHE_SECONDS", 300, minimum=0),
+        metrics_dir=env.str("METRICS_DIR", "metrics"),
+        memory_limit_mb=env.int("MEMORY_LIMIT_MB", 1536, minimum=0),
+        js_heap_limit_mb=env.int("JS_HEAP_LIMIT_MB", 512, minimum=0),
+        browser_cache_dir=env.str("BROWSER_CACHE_DIR", ""),
+        browser_cache_mb=env.int("BROWSER_CACHE_MB", 200, minimum=1),
+        work_queue=env.str("WORK_QUEUE", ""),
+        queue_lease_seconds=env.int("QUEUE_LEASE_SECONDS", 300, minimum=30),
+        max_consecutive_failures=env.int("MAX_CONSECUTIVE_FAILURES", 5, minimum=0),
+        run_deadline=env.clock("RUN_DEADLINE"),
+        run_budget_minutes=env.float("RUN_BUDGET_MINUTES", 0, minimum=0),
+        errors=tuple(env.errors),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_daily_requirements(file_path='daily_requirements.json'):
+    """Read daily_requirements.json once per process; an unreadable file means defaults"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logging.warning("⚠️ 未找到 daily_requirements.json，使用默认值：50浏览量/180秒")
+    except json.JSONDecodeError:
+        logging.error("❌ daily_requirements.json 格式错误，使用默认值：50浏览量/180秒")
+    return {}
 
-user_count = len(accounts)
 
-logging.info(f"共找到 {user_count} 个账户")
+def daily_requirements_for(domain):
+    requirements = load_daily_requirements().get(domain)
+    if requirements is None:
+        return dict(DEFAULT_DAILY_REQUIREMENTS), False
+    return dict(DEFAULT_DAILY_REQUIREMENTS, **requirements), True
 
 
 def load_send():
@@ -118,63 +308,1543 @@ def load_send():
         return False
 
 
+def atomic_write_json(file_path, data):
+    """Write JSON through a temp file and os.replace so readers never see a partial file"""
+    directory = path.dirname(path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class ResourcePolicy:
+    """Block heavy resources through CDP and count the requests and bytes saved"""
+
+    # 被拦截的请求没有实际大小，按资源类型的典型大小估算节省的流量
+    TYPICAL_SIZES = {
+        'Image': 30 * 1024,
+        'Media': 500 * 1024,
+        'Font': 40 * 1024,
+        'Script': 50 * 1024,
+    }
+    DEFAULT_SIZE = 20 * 1024
+
+    def __init__(self, profile='full'):
+        self.profile = profile
+        self.patterns = RESOURCE_PROFILES[profile]
+        self.blocked_requests = 0
+        self.saved_bytes = 0
+        self.finished_requests = 0
+        self.transferred_bytes = 0
+        self._types = {}
+
+    def apply(self, driver):
+        """Install the block list on the current tab; every new tab needs its own call"""
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.patterns})
+
+    def collect(self, driver):
+        """Drain the performance log and update the counters"""
+        if not self.patterns:
+            return
+        try:
+            entries = driver.get_log('performance')
+        except Exception:
+            return
+
+        for entry in entries:
+            message = json.loads(entry['message'])['message']
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.requestWillBeSent':
+                self._types[params.get('requestId')] = params.get('type')
+            elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                resource_type = self._types.pop(params.get('requestId'), params.get('type'))
+                self.blocked_requests += 1
+                self.saved_bytes += self.TYPICAL_SIZES.get(resource_type, self.DEFAULT_SIZE)
+            elif method == 'Network.loadingFinished':
+                self._types.pop(params.get('requestId'), None)
+                self.finished_requests += 1
+                self.transferred_bytes += int(params.get('encodedDataLength', 0))
+
+    def log_summary(self):
+        if not self.patterns:
+            return
+        logging.info(
+            f"🧱 资源拦截（{self.profile}）：拦截 {self.blocked_requests} 个请求，"
+            f"约节省 {self.saved_bytes / 1024 / 1024:.1f} MB；"
+            f"实际下载 {self.finished_requests} 个请求，{self.transferred_bytes / 1024 / 1024:.1f} MB"
+        )
+
+
+class SessionCache:
+    """On-disk session cookies per (domain, username), one file per key so workers never collide"""
+
+    COOKIE_FIELDS = ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry', 'sameSite')
+
+    def __init__(self, directory, ttl_hours=72):
+        self.directory = directory
+        self.ttl = ttl_hours * 3600
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _path(self, domain, username):
+        key = hashlib.sha1(f"{domain}\n{username}".encode('utf-8')).hexdigest()
+        return path.join(self.directory, f"{key}.json")
+
+    def load(self, domain, username):
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(domain, username), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        now = time.time()
+        if entry.get('expires_at', 0) <= now:
+            self.drop(domain, username)
+            return None
+        return [c for c in entry.get('cookies', []) if c.get('expiry', now + 1) > now]
+
+    def save(self, domain, username, cookies):
+        if not self.enabled:
+            return
+        cookies = [
+            {k: v for k, v in cookie.items() if k in self.COOKIE_FIELDS}
+            for cookie in cookies
+        ]
+        # mkstemp 创建的文件权限为 0600，会话 Cookie 不会被其他用户读取
+        atomic_write_json(self._path(domain, username), {
+            'domain': domain,
+            'username': username,
+            'saved_at': time.time(),
+            'expires_at': time.time() + self.ttl,
+            'cookies': cookies,
+        })
+
+    def drop(self, domain, username):
+        try:
+            os.unlink(self._path(domain, username))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def to_cdp(cookie, url):
+        """Convert a WebDriver cookie for Network.setCookies, which works before any page is open"""
+        cdp = {'name': cookie['name'], 'value': cookie['value'], 'url': url}
+        for field_name in ('domain', 'path', 'secure', 'httpOnly'):
+            if field_name in cookie:
+                cdp[field_name] = cookie[field_name]
+        if 'expiry' in cookie:
+            cdp['expires'] = cookie['expiry']
+        if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+            cdp['sameSite'] = cookie['sameSite']
+        return cdp
+
+
+class BrowserCache:
+    """Persistent per-domain Chrome disk cache shared by accounts and runs
+
+    Only HTTP cache entries (Ember bundles, CSS, fonts, emoji) live here; cookies and
+    storage stay in each browser's throwaway profile. Chrome cannot share a cache
+    directory between running instances, so every domain directory is guarded by an
+    flock held for the browser's lifetime; a browser that cannot get it runs cold.
+    """
+
+    # 超过这么多天未使用的域名缓存会被整个删除
+    MAX_IDLE_DAYS = 14
+
+    def __init__(self, directory, size_mb=200):
+        self.directory = directory
+        self.size = int(size_mb * 1024 * 1024)
+        self._locks = {}
+
+    @property
+    def enabled(self):
+        return bool(self.directory) and self.size > 0 and fcntl is not None
+
+    def key(self, domain):
+        """Pool key for browsers of this domain, None when the cache is off"""
+        return domain if self.enabled else None
+
+    def _dir(self, domain):
+        return path.join(self.directory, domain.replace(':', '_'))
+
+    @staticmethod
+    def _try_lock(cache_dir):
+        fd = os.open(path.join(cache_dir, '.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def acquire(self, domain):
+        """Lock and return the domain's cache directory, or None if another browser holds it"""
+        cache_dir = self._dir(domain)
+        os.makedirs(cache_dir, exist_ok=True)
+        fd = self._try_lock(cache_dir)
+        if fd is None:
+            logging.info(f"💾 {domain} 的磁盘缓存正被其他浏览器使用，本次不使用共享缓存")
+            return None
+        # 目录的修改时间记录最近一次使用，供 prune 判断
+        os.utime(cache_dir)
+        return cache_dir, fd
+
+    def chrome_arguments(self, cache_dir):
+        # Chrome 在 --disk-cache-size 上限内自行按最近使用淘汰缓存条目
+        return [f"--disk-cache-dir={path.abspath(cache_dir)}", f"--disk-cache-size={self.size}"]
+
+    def hold(self, driver, fd):
+        self._locks[id(driver)] = fd
+
+    def release(self, driver):
+        fd = self._locks.pop(id(driver), None)
+        if fd is not None:
+            os.close(fd)
+
+    def prune(self):
+        """Drop whole domain caches that have not been used for MAX_IDLE_DAYS"""
+        if not self.enabled or not path.isdir(self.directory):
+            return
+        cutoff = time.time() - self.MAX_IDLE_DAYS * 86400
+        for entry in os.listdir(self.directory):
+            cache_dir = path.join(self.directory, entry)
+            if not path.isdir(cache_dir) or path.getmtime(cache_dir) >= cutoff:
+                continue
+            fd = self._try_lock(cache_dir)
+            if fd is None:
+                continue
+            try:
+                logging.info(f"🧹 删除 {self.MAX_IDLE_DAYS} 天未使用的磁盘缓存：{entry}")
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            finally:
+                os.close(fd)
+
+
+def connect_state_db(db_path, read_only=False):
+    if read_only:
+        # 只查看状态的命令（--plan）不建表、不清理旧数据，也不切换日志模式
+        return sqlite3.connect(f"file:{quote(path.abspath(db_path))}?mode=ro", uri=True, timeout=30)
+    conn = sqlite3.connect(db_path, timeout=30)
+    # WAL 模式允许并发进程同时读写
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+
+def table_exists(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+class SeenTopicIndex:
+    """Per-account index of visited, skipped and liked topics, kept across runs"""
+
+    # failed 只在本次运行中跳过，下次运行会重试
+    PERSISTENT_STATUSES = ('visited', 'skipped')
+
+    def __init__(self, db_path, domain, username, retention_days=30):
+        self.domain = domain
+        self.username = username
+        self.conn = connect_state_db(db_path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS seen_topics (
+                domain TEXT NOT NULL,
+                username TEXT NOT NULL,
+                topic_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (domain, username, topic_id)
+            )
+        ''')
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_seen_topics_last_seen ON seen_topics (last_seen)'
+        )
+        # 点赞是永久的，不随 retention_days 清理
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS liked_topics (
+                domain TEXT NOT NULL,
+                username TEXT NOT NULL,
+                topic_id INTEGER NOT NULL,
+                liked_at REAL NOT NULL,
+                PRIMARY KEY (domain, username, topic_id)
+            )
+        ''')
+        if retention_days > 0:
+            self.conn.execute(
+                'DELETE FROM seen_topics WHERE last_seen < ?',
+                (time.time() - retention_days * 86400,)
+            )
+        self.conn.commit()
+
+        rows = self.conn.execute(
+            'SELECT topic_id FROM seen_topics WHERE domain = ? AND username = ? AND status IN (?, ?)',
+            (domain, username) + self.PERSISTENT_STATUSES
+        )
+        self.seen = {row[0] for row in rows}
+        logging.info(f"🗂️ 已记录 {len(self.seen)} 个浏览过或跳过的帖子")
+        rows = self.conn.execute(
+            'SELECT topic_id FROM liked_topics WHERE domain = ? AND username = ?', (domain, username)
+        )
+        self.liked = {row[0] for row in rows}
+
+    def filter_unseen(self, topics):
+        return [t for t in topics if t.get('id') is None or t['id'] not in self.seen]
+
+    def mark(self, topic_id, status):
+        if topic_id is None:
+            return
+        now = time.time()
+        self.seen.add(topic_id)
+        self.conn.execute('''
+            INSERT INTO seen_topics (domain, username, topic_id, status, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (domain, username, topic_id)
+            DO UPDATE SET status = excluded.status, last_seen = excluded.last_seen
+        ''', (self.domain, self.username, topic_id, status, now, now))
+        self.conn.commit()
+
+    def mark_liked(self, topic_id):
+        if topic_id is None or topic_id in self.liked:
+            return
+        self.liked.add(topic_id)
+        self.conn.execute(
+            'INSERT OR IGNORE INTO liked_topics (domain, username, topic_id, liked_at) VALUES (?, ?, ?, ?)',
+            (self.domain, self.username, topic_id, time.time())
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def requirements_met(requirements, progress):
+    return (progress['browse_count'] >= requirements['daily_views']
+            and progress['total_time'] >= requirements['daily_time'])
+
+
+class ProgressCheckpoint:
+    """Per-account progress for the current day, saved after every topic so reruns resume"""
+
+    # 只保留最近几天的进度记录
+    KEEP_DAYS = 7
+
+    def __init__(self, db_path, domain, username, read_only=False):
+        self.domain = domain
+        self.username = username
+        self.day = time.strftime('%Y-%m-%d')
+        self.conn = connect_state_db(db_path, read_only)
+        if not read_only:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS daily_progress (
+                    domain TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    browse_count INTEGER NOT NULL,
+                    total_time REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (domain, username, day)
+                )
+            ''')
+            self.conn.execute(
+                'DELETE FROM daily_progress WHERE day < ?',
+                (time.strftime('%Y-%m-%d', time.localtime(time.time() - self.KEEP_DAYS * 86400)),)
+            )
+            self.conn.commit()
+
+        row = None
+        if not read_only or table_exists(self.conn, 'daily_progress'):
+            row = self.conn.execute(
+                'SELECT browse_count, total_time FROM daily_progress WHERE domain = ? AND username = ? AND day = ?',
+                (domain, username, self.day)
+            ).fetchone()
+        self.progress = {
+            'browse_count': row[0] if row else 0,
+            'total_time': row[1] if row else 0
+        }
+
+    def save(self, progress):
+        self.progress = dict(progress)
+        # 单条 UPSERT 在事务中提交，进程中途被杀也不会留下半写的记录
+        self.conn.execute('''
+            INSERT INTO daily_progress (domain, username, day, browse_count, total_time, updated)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (domain, username, day)
+            DO UPDATE SET browse_count = excluded.browse_count,
+                          total_time = excluded.total_time,
+                          updated = excluded.updated
+        ''', (self.domain, self.username, self.day,
+              progress['browse_count'], progress['total_time'], time.time()))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class AdaptiveTimeouts:
+    """Per-domain timeouts derived from the latency percentiles of earlier waits and page loads"""
+
+    # 每个（域名，标签）保留的样本数，以及开始自适应所需的最少样本数
+    MAX_SAMPLES = 200
+    MIN_SAMPLES = 20
+    PERCENTILE = 0.95
+    # 超时 = p95 × HEADROOM，限制在代码中默认值的 1/4 到 3 倍之间，且不低于 MIN_TIMEOUT 秒
+    HEADROOM = 2.0
+    MIN_TIMEOUT = 2.0
+
+    def __init__(self, db_path, domain):
+        self.domain = domain
+        self.conn = connect_state_db(db_path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS latency_samples (
+                domain TEXT NOT NULL,
+                label TEXT NOT NULL,
+                seconds REAL NOT NULL,
+                recorded REAL NOT NULL
+            )
+        ''')
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_latency_samples_key ON latency_samples (domain, label, recorded)'
+        )
+        self.conn.commit()
+
+        samples = {}
+        rows = self.conn.execute(
+            'SELECT label, seconds FROM latency_samples WHERE domain = ? ORDER BY recorded DESC', (domain,)
+        )
+        for label, seconds in rows:
+            bucket = samples.setdefault(label, [])
+            if len(bucket) < self.MAX_SAMPLES:
+                bucket.append(seconds)
+        self.percentiles = {
+            label: self.percentile(values, self.PERCENTILE)
+            for label, values in samples.items() if len(values) >= self.MIN_SAMPLES
+        }
+
+    @staticmethod
+    def percentile(values, q):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def get(self, label, default):
+        """Learned timeout for a wait label, or the default until enough samples exist"""
+        p95 = self.percentiles.get(label)
+        if p95 is None:
+            return default
+        return min(max(p95 * self.HEADROOM, default / 4, self.MIN_TIMEOUT), default * 3)
+
+    def save(self, timings):
+        """Store this run's samples ({label: [seconds]}) and keep the newest MAX_SAMPLES per label"""
+        now = time.time()
+        self.conn.executemany(
+            'INSERT INTO latency_samples (domain, label, seconds, recorded) VALUES (?, ?, ?, ?)',
+            [(self.domain, label, seconds, now) for label, values in timings.items() for seconds in values]
+        )
+        for label in timings:
+            self.conn.execute('''
+                DELETE FROM latency_samples WHERE domain = ? AND label = ? AND rowid NOT IN (
+                    SELECT rowid FROM latency_samples WHERE domain = ? AND label = ?
+                    ORDER BY recorded DESC LIMIT ?
+                )
+            ''', (self.domain, label, self.domain, label, self.MAX_SAMPLES))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class CircuitOpenError(Exception):
+    """An account kept failing; further work on its domain would only spin"""
+
+
+class RecycleError(Exception):
+    """The browser was discarded mid-account and a working replacement could not be set up"""
+
+
+class OpenCircuits:
+    """Domains whose breaker tripped in one run, shared by every worker process of that run"""
+
+    # 只保留最近一天的记录，run_id 不同的运行互不影响
+    KEEP_SECONDS = 86400
+
+    def __init__(self, db_path, run_id):
+        self.run_id = run_id
+        self.conn = connect_state_db(db_path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS open_circuits (
+                run_id TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                opened REAL NOT NULL,
+                PRIMARY KEY (run_id, domain)
+            )
+        ''')
+        self.conn.execute('DELETE FROM open_circuits WHERE opened < ?', (time.time() - self.KEEP_SECONDS,))
+        self.conn.commit()
+
+    def get(self, domain):
+        row = self.conn.execute(
+            'SELECT reason FROM open_circuits WHERE run_id = ? AND domain = ?', (self.run_id, domain)
+        ).fetchone()
+        return row[0] if row else None
+
+    def open(self, domain, reason):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO open_circuits (run_id, domain, reason, opened) VALUES (?, ?, ?, ?)',
+            (self.run_id, domain, reason, time.time())
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class RunHistory:
+    """Per-domain timings from past runs, used to predict how long an account will take"""
+
+    # 指数加权平均中新数据的权重
+    ALPHA = 0.3
+    # 没有历史数据时的估计：每个帖子（加载 + 停留）和每个账号的固定开销（启动浏览器 + 登录）
+    DEFAULT_TOPIC_SECONDS = 10
+    DEFAULT_OVERHEAD_SECONDS = 30
+
+    def __init__(self, db_path, read_only=False):
+        self.conn = connect_state_db(db_path, read_only)
+        if read_only:
+            self.empty = not table_exists(self.conn, 'run_history')
+            return
+        self.empty = False
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS run_history (
+                domain TEXT PRIMARY KEY,
+                topic_seconds REAL NOT NULL,
+                overhead_seconds REAL NOT NULL,
+                runs INTEGER NOT NULL,
+                updated REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def timings(self, domain):
+        """Return (topic_seconds, overhead_seconds) for a domain"""
+        row = None
+        if not self.empty:
+            row = self.conn.execute(
+                'SELECT topic_seconds, overhead_seconds FROM run_history WHERE domain = ?', (domain,)
+            ).fetchone()
+        if row is None:
+            return self.DEFAULT_TOPIC_SECONDS, self.DEFAULT_OVERHEAD_SECONDS
+        return row
+
+    def record(self, domain, topic_seconds, overhead_seconds):
+        row = self.conn.execute(
+            'SELECT topic_seconds, overhead_seconds, runs FROM run_history WHERE domain = ?', (domain,)
+        ).fetchone()
+        runs = 1
+        if row is not None:
+            topic_seconds = row[0] + self.ALPHA * (topic_seconds - row[0])
+            overhead_seconds = row[1] + self.ALPHA * (overhead_seconds - row[1])
+            runs = row[2] + 1
+        self.conn.execute('''
+            INSERT OR REPLACE INTO run_history (domain, topic_seconds, overhead_seconds, runs, updated)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (domain, topic_seconds, overhead_seconds, runs, time.time()))
+        self.conn.commit()
+
+    def estimate(self, account, progress):
+        """Predicted seconds to finish today's target from the given progress"""
+        requirements, _ = daily_requirements_for(account.domain)
+        if requirements_met(requirements, progress):
+            return 0, self.DEFAULT_TOPIC_SECONDS
+        topic_seconds, overhead_seconds = self.timings(account.domain)
+        views = max(0, requirements['daily_views'] - progress['browse_count'])
+        reading = max(0, requirements['daily_time'] - progress['total_time'])
+        topics = max(views, int(-(-reading // topic_seconds)), 1)
+        return overhead_seconds + topics * topic_seconds, topic_seconds
+
+    def close(self):
+        self.conn.close()
+
+
+@dataclass(frozen=True)
+class ScheduledAccount:
+    index: int
+    account: AccountConfig
+    # 预计用时（秒）、计划开始时间和该账号停止开始新帖子的时间
+    estimate: float
+    start: float = 0
+    deadline: Optional[float] = None
+    # 窗口内只够完成一部分
+    partial: bool = False
+
+
+# 剩余时间至少够浏览这么多个帖子时，才会启动一个无法在窗口内完成的账号
+MIN_PARTIAL_TOPICS = 5
+
+
+def run_deadline(config, now):
+    """Absolute deadline from RUN_DEADLINE and RUN_BUDGET_MINUTES, or None"""
+    deadlines = []
+    if config.run_budget_minutes:
+        deadlines.append(now + config.run_budget_minutes * 60)
+    if config.run_deadline:
+        hour, minute = (int(part) for part in config.run_deadline.split(':'))
+        local = time.localtime(now)
+        target = time.mktime((local.tm_year, local.tm_mon, local.tm_mday, hour, minute, 0, 0, 0, -1))
+        # 截止时刻已过则视为第二天（例如 23:30 启动、01:00 截止）
+        if target <= now:
+            target += 86400
+        deadlines.append(target)
+    return min(deadlines) if deadlines else None
+
+
+def schedule_accounts(config, workers=1, now=None, read_only=False):
+    """Order accounts to fit the run deadline; returns (scheduled, deferred)
+
+    With read_only the state DB is never created, migrated or pruned.
+    """
+    now = now or time.time()
+    deadline = run_deadline(config, now)
+    entries = []
+    db_path = config.state_db
+    if read_only and not path.exists(db_path):
+        # 还没有运行过：没有历史和进度，用内存库得到默认估计
+        db_path, read_only = ':memory:', False
+    try:
+        history = RunHistory(db_path, read_only)
+        try:
+            for i, account in enumerate(config.accounts):
+                checkpoint = ProgressCheckpoint(db_path, account.domain, account.username, read_only)
+                checkpoint.close()
+                estimate, topic_seconds = history.estimate(account, checkpoint.progress)
+                entries.append((ScheduledAccount(i, account, estimate), topic_seconds))
+        finally:
+            history.close()
+    except sqlite3.Error as e:
+        logging.warning(f"读取运行历史失败，按配置顺序执行: {e}")
+        return [ScheduledAccount(i, acc, 0) for i, acc in enumerate(config.accounts)], []
+
+    if deadline is None:
+        return [entry for entry, _ in entries], []
+
+    # 最短预计用时优先，窗口内能完成的账号最多；已完成的账号排在最前面，很快就会跳过
+    entries.sort(key=lambda item: item[0].estimate)
+    # 列表调度：模拟 workers 个进程，每个账号交给最早空闲的进程
+    free_at = [now] * workers
+    lanes = [[] for _ in range(workers)]
+    deferred = []
+    for entry, topic_seconds in entries:
+        lane = min(range(workers), key=free_at.__getitem__)
+        start = free_at[lane]
+        available = deadline - start
+        if entry.estimate <= available:
+            entry = replace(entry, start=start)
+        elif available >= RunHistory.DEFAULT_OVERHEAD_SECONDS + MIN_PARTIAL_TOPICS * topic_seconds:
+            entry = replace(entry, start=start, estimate=available, partial=True)
+        else:
+            deferred.append(entry)
+            continue
+        free_at[lane] = start + entry.estimate
+        lanes[lane].append(entry)
+
+    # 每个账号的截止时间 = 全局截止时间减去同一进程上排在它后面的账号的预计用时，
+    # 超时的账号不会挤占后面账号的时间
+    scheduled = []
+    for lane in lanes:
+        reserved = 0
+        for entry in reversed(lane):
+            scheduled.append(replace(entry, deadline=deadline - reserved))
+            reserved += entry.estimate
+    scheduled.sort(key=lambda entry: entry.start)
+    return scheduled, deferred
+
+
+class WorkQueue:
+    """Per-account jobs in a shared SQLite file, claimed by workers on any host with renewable leases
+
+    A job is (day, domain, username). Workers lease one job at a time and renew the lease
+    from a heartbeat thread; a job whose lease expired (its worker died) is leased again,
+    up to MAX_ATTEMPTS times. Failed jobs wait RETRY_DELAY seconds per attempt before they
+    can be leased again, and a job a worker released is left for the other workers.
+    """
+
+    MAX_ATTEMPTS = 3
+    # 失败任务重新排队前的等待时间（秒），按已尝试次数递增，给论坛恢复和其他节点领取留出时间
+    RETRY_DELAY = 300
+
+    def __init__(self, db_path, lease_seconds=300):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        # 一个进程只处理启动当天的任务，跨过零点也不会领到第二天的任务
+        self.day = time.strftime('%Y-%m-%d')
+        # 任务中保存了账户密码，和会话缓存一样只允许当前用户读写（SQLite 的日志文件沿用同样的权限）
+        os.close(os.open(db_path, os.O_RDWR | os.O_CREAT, 0o600))
+        try:
+            os.chmod(db_path, 0o600)
+        except OSError as e:
+            logging.warning(f"无法限制队列文件的访问权限: {e}")
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    day TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    account TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_expires REAL,
+                    not_before REAL,
+                    released_by TEXT,
+                    result TEXT,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (day, domain, username)
+                )
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        # 队列文件可能放在多台机器共享的目录中，不使用依赖共享内存的 WAL 模式；
+        # isolation_level=None 后由 BEGIN IMMEDIATE 显式加写锁，保证领取任务的原子性
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, accounts):
+        """Add today's job for every account; existing jobs are left untouched"""
+        now = time.time()
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('''
+                INSERT OR IGNORE INTO jobs (day, domain, username, account, status, updated)
+                VALUES (?, ?, ?, ?, 'pending', ?)
+            ''', [
+                (self.day, acc.domain, acc.username, json.dumps(asdict(acc)), now)
+                for acc in accounts
+            ])
+            conn.execute('COMMIT')
+            return conn.total_changes - before
+
+    def _claimable(self, skip_domains):
+        """WHERE clause (and its parameters) for pending jobs this worker may lease"""
+        sql = '''day = ? AND status = 'pending' AND COALESCE(released_by, '') != ?'''
+        params = (self.day, self.worker_id)
+        if skip_domains:
+            sql += f" AND domain NOT IN ({', '.join('?' * len(skip_domains))})"
+            params += tuple(skip_domains)
+        return sql, params
+
+    def claim(self, skip_domains=()):
+        """Lease the next runnable job and return its AccountConfig, or None when nothing is left"""
+        now = time.time()
+        claimable, params = self._claimable(skip_domains)
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # 租约多次过期的任务不再重试，避免反复拖垮工作节点
+                conn.execute('''
+                    UPDATE jobs SET status = 'failed', updated = ?, result = ?
+                    WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+                ''', (now, json.dumps({'error': '租约多次过期，工作节点可能已崩溃'}), now, self.MAX_ATTEMPTS))
+                row = conn.execute(f'''
+                    SELECT domain, username, account FROM jobs
+                    WHERE ({claimable} AND COALESCE(not_before, 0) <= ?)
+                       OR (day = ? AND status = 'leased' AND lease_expires < ?)
+                    ORDER BY attempts, rowid LIMIT 1
+                ''', params + (now, self.day, now)).fetchone()
+                if row is not None:
+                    conn.execute('''
+                        UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?,
+                                        attempts = attempts + 1, released_by = NULL, updated = ?
+                        WHERE day = ? AND domain = ? AND username = ?
+                    ''', (self.worker_id, now + self.lease_seconds, now, self.day, row[0], row[1]))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        if row is None:
+            return None
+        return AccountConfig(**json.loads(row[2]))
+
+    def next_retry(self, skip_domains=()):
+        """When the earliest delayed job becomes claimable for this worker, or None if there is none"""
+        claimable, params = self._claimable(skip_domains)
+        with self._connect() as conn:
+            row = conn.execute(
+                f'SELECT MIN(not_before) FROM jobs WHERE {claimable} AND not_before IS NOT NULL', params
+            ).fetchone()
+        return row[0]
+
+    def release(self, account):
+        """Hand a leased job back without using up an attempt; this worker will not lease it again"""
+        return self._update_own(
+            account,
+            "UPDATE jobs SET status = 'pending', attempts = attempts - 1, lease_expires = NULL, "
+            "released_by = ?, updated = ?",
+            (self.worker_id, time.time())
+        )
+
+    def _update_own(self, account, sql, params):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                sql + " WHERE day = ? AND domain = ? AND username = ? AND worker = ? AND status = 'leased'",
+                params + (self.day, account.domain, account.username, self.worker_id)
+            )
+            return cursor.rowcount > 0
+
+    def heartbeat(self, account):
+        """Extend our lease; False if the job was taken over by another worker"""
+        now = time.time()
+        return self._update_own(
+            account, 'UPDATE jobs SET lease_expires = ?, updated = ?', (now + self.lease_seconds, now)
+        )
+
+    @contextmanager
+    def lease(self, account):
+        """Keep the lease alive from a background thread while the account runs"""
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    if not self.heartbeat(account):
+                        logging.warning(f"⚠️ {account.domain} - {account.username} 的租约已被其他节点接管")
+                        return
+                except sqlite3.Error as e:
+                    logging.warning(f"续租失败: {e}")
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, account, record):
+        """Store the result; failed jobs go back to the queue until MAX_ATTEMPTS is used up"""
+        result = {k: v for k, v in record.items() if k not in ('metrics', 'profile')}
+        status = 'done'
+        not_before = None
+        if record.get('error'):
+            status = 'failed'
+            with self._connect() as conn:
+                attempts = conn.execute(
+                    'SELECT attempts FROM jobs WHERE day = ? AND domain = ? AND username = ?',
+                    (self.day, account.domain, account.username)
+                ).fetchone()
+            if attempts is not None and attempts[0] < self.MAX_ATTEMPTS:
+                status = 'pending'
+                not_before = time.time() + self.RETRY_DELAY * attempts[0]
+        stored = self._update_own(
+            account, 'UPDATE jobs SET status = ?, result = ?, lease_expires = NULL, not_before = ?, updated = ?',
+            (status, json.dumps(result, ensure_ascii=False), not_before, time.time())
+        )
+        if not stored:
+            logging.warning(f"⚠️ {account.domain} - {account.username} 的租约已失效，结果未写回队列")
+
+    def status(self):
+        with self._connect() as conn:
+            return conn.execute('''
+                SELECT day, domain, username, status, attempts, worker, lease_expires, not_before, result
+                FROM jobs ORDER BY day DESC, rowid
+            ''').fetchall()
+
+
+# 帖子列表行的公共解析函数，供提取脚本和滚动脚本共用
+TOPIC_ROW_JS = """
+function topicId(link, row) {
+    var id = row.getAttribute('data-topic-id');
+    if (!id) {
+        var m = (link.href || '').match(/\\/t\\/(?:[^\\/]+\\/)?(\\d+)/);
+        id = m ? m[1] : null;
+    }
+    return id ? parseInt(id, 10) : null;
+}
+function isPinned(row) {
+    return !!row.querySelector('.topic-statuses .pinned') || row.classList.contains('pinned');
+}
+"""
+
+# 一次性提取帖子列表：避免逐行调用 find_element / get_attribute 产生的大量 WebDriver 往返。
+# 浏览量优先取 title 中的完整数字（不依赖语言），否则解析 "1.2k" 这类缩写。
+TOPIC_EXTRACT_SCRIPT = TOPIC_ROW_JS + """
+function parseCount(el) {
+    if (!el) return null;
+    var nums = (el.getAttribute('title') || '').replace(/[,.\\s\\u00a0\\u202f']/g, '').match(/\\d+/g);
+    if (nums) return Math.max.apply(null, nums.map(Number));
+    var m = (el.textContent || '').trim().toLowerCase().match(/^([\\d.,]+)\\s*([km]?)/);
+    if (!m) return null;
+    var n = parseFloat(m[1].replace(/,/g, ''));
+    if (m[2] === 'k') n *= 1000;
+    if (m[2] === 'm') n *= 1000000;
+    return Math.round(n);
+}
+var records = [];
+document.querySelectorAll('#list-area .title').forEach(function (link) {
+    var row = link.closest('tr');
+    if (!row) return;
+    records.push({
+        id: topicId(link, row),
+        url: link.href || '',
+        title: (link.textContent || '').trim(),
+        pinned: isPinned(row),
+        views: parseCount(row.querySelector('.num.views .number')),
+        read: row.classList.contains('visited')
+    });
+});
+return records;
+"""
+
+# 页面内一次性完成滚动：直到列表中未处理、非置顶的帖子达到目标数量，
+# 或无限滚动不再加载新行（idleMs 内行数不变且没有加载动画），或超过 maxMs。
+SCROLL_UNTIL_SCRIPT = TOPIC_ROW_JS + """
+var target = arguments[0], seen = new Set(arguments[1]), maxMs = arguments[2], idleMs = arguments[3];
+var done = arguments[arguments.length - 1];
+var start = Date.now(), lastGrowth = start, lastRows = -1;
+function countUnseen() {
+    var links = document.querySelectorAll('#list-area .title'), unseen = 0;
+    for (var i = 0; i < links.length; i++) {
+        var row = links[i].closest('tr');
+        if (!row || isPinned(row)) continue;
+        var id = topicId(links[i], row);
+        if (id !== null && seen.has(id)) continue;
+        unseen++;
+    }
+    return {rows: links.length, unseen: unseen};
+}
+function loading() {
+    var spinners = document.querySelectorAll('.loading-container .spinner, .topic-list-bottom .spinner');
+    for (var i = 0; i < spinners.length; i++) {
+        if (spinners[i].offsetParent !== null) return true;
+    }
+    return false;
+}
+function step() {
+    var state = countUnseen(), now = Date.now();
+    if (state.rows !== lastRows || loading()) {
+        if (state.rows !== lastRows) lastRows = state.rows;
+        lastGrowth = now;
+    }
+    if (state.unseen >= target) state.reason = 'target';
+    else if (now - lastGrowth >= idleMs) state.reason = 'exhausted';
+    else if (now - start >= maxMs) state.reason = 'timeout';
+    if (state.reason) {
+        state.elapsed = now - start;
+        return done(state);
+    }
+    window.scrollTo(0, document.body.scrollHeight);
+    setTimeout(step, 100);
+}
+step();
+"""
+
+# 列表底部多久没有新行即认为无限滚动已到底（毫秒）
+SCROLL_IDLE_MS = 2000
+
+# 滚动模式下整批帖子都已处理过时，下次滚动时间翻倍，最多放大到的倍数
+MAX_SCROLL_SCALE = 8
+
+# 单个帖子的平均停留时间（秒），用于把剩余阅读时间折算成帖子数
+AVERAGE_DWELL_TIME = 7.5
+
+# 通过 Discourse 的前端路由跳转，不重新启动 Ember 应用；路由不可用时返回 false
+SPA_ROUTE_SCRIPT = """
+const path = arguments[0];
+try {
+    require('discourse/lib/url').default.routeTo(path);
+    return true;
+} catch (e) {}
+try {
+    Discourse.__container__.lookup('service:router').transitionTo(path);
+    return true;
+} catch (e) {}
+return false;
+"""
+
+# 帖子路由切换完成：#topic 已换成目标帖子，帖子内容已渲染且没有可见的加载动画
+TOPIC_READY_SCRIPT = """
+const topic = document.querySelector('#topic');
+if (!topic || topic.getAttribute('data-topic-id') !== String(arguments[0])) return false;
+if (!document.querySelector('#post_1, .topic-post')) return false;
+const spinners = document.querySelectorAll('#main-outlet .spinner, .loading-container .spinner');
+for (let i = 0; i < spinners.length; i++) {
+    if (spinners[i].offsetParent !== null) return false;
+}
+return true;
+"""
+
+# 一次读取首个帖子点赞按钮的状态，不依赖界面语言：
+# 帖子未渲染返回 null（继续等待），没有按钮（自己的帖子、已关闭或锁定的帖子）返回 missing，
+# 已点赞返回 liked，否则在 arguments[0] 为 true 时直接点击并返回 clicked
+LIKE_SCRIPT = """
+const click = arguments[0];
+const post = document.querySelector('#post_1, .topic-post');
+if (!post) return null;
+const button = post.querySelector('.btn-toggle-reaction-like');
+if (!button || button.disabled) return 'missing';
+if (button.classList.contains('has-like') || button.getAttribute('aria-pressed') === 'true'
+        || button.closest('.has-reacted')) {
+    return 'liked';
+}
+if (click) button.click();
+return 'clicked';
+"""
+
+
+class ListingCache:
+    """Per-domain topic listings shared by accounts and workers for a short TTL
+
+    Only account-independent fields are stored; the per-user read flag is dropped and
+    every account still applies its own seen filter and like threshold.
+    """
+
+    SHARED_FIELDS = ('id', 'url', 'title', 'pinned', 'views')
+
+    def __init__(self, db_path, domain, ttl_seconds=300):
+        self.domain = domain
+        self.ttl = ttl_seconds
+        self.conn = connect_state_db(db_path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS topic_listings (
+                domain TEXT NOT NULL,
+                source TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                topics TEXT NOT NULL,
+                has_more INTEGER NOT NULL,
+                fetched REAL NOT NULL,
+                PRIMARY KEY (domain, source, page)
+            )
+        ''')
+        self.conn.execute('DELETE FROM topic_listings WHERE fetched < ?', (time.time() - self.ttl,))
+        self.conn.commit()
+
+    def get(self, source, page=0):
+        """Return (topics, has_more) if a fresh listing exists, else None"""
+        row = self.conn.execute(
+            'SELECT topics, has_more FROM topic_listings '
+            'WHERE domain = ? AND source = ? AND page = ? AND fetched >= ?',
+            (self.domain, source, page, time.time() - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), bool(row[1])
+
+    def put(self, source, page, topics, has_more=False):
+        shared = [{k: topic.get(k) for k in self.SHARED_FIELDS} for topic in topics]
+        self.conn.execute(
+            'INSERT OR REPLACE INTO topic_listings (domain, source, page, topics, has_more, fetched) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (self.domain, source, page, json.dumps(shared, ensure_ascii=False), int(has_more), time.time())
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class LatestTopicsClient:
+    """Page through /latest.json over a pooled HTTP session that reuses the browser's cookies"""
+
+    def __init__(self, driver, timeout=10, listing_cache=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        parsed = urlparse(driver.current_url)
+        self.base_url = f"{parsed.scheme}://{parsed.netloc}"
+        self.timeout = timeout
+        self.listing_cache = listing_cache
+        self.page = 0
+        # 上一批次是否已翻到最后一页
+        self.exhausted = False
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=4,
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504)),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': driver.execute_script('return navigator.userAgent'),
+            'Accept': 'application/json',
+            'X-Requested-With': 'XMLHttpRequest',
+        })
+        self.sync_cookies(driver)
+
+        # 单线程预取下一页，阅读当前批次时下一批已在路上
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._prefetch = None
+
+    def sync_cookies(self, driver):
+        for cookie in driver.get_cookies():
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain'),
+                path=cookie.get('path', '/'),
+            )
+
+    def fetch_page(self, page):
+        response = self.session.get(
+            f"{self.base_url}/latest.json", params={'page': page}, timeout=self.timeout
+        )
+        response.raise_for_status()
+        topic_list = response.json().get('topic_list', {})
+        topics = [self._to_record(topic) for topic in topic_list.get('topics', [])]
+        return topics, bool(topic_list.get('more_topics_url'))
+
+    def _to_record(self, topic):
+        last_read = topic.get('last_read_post_number')
+        return {
+            'id': topic['id'],
+            'url': f"{self.base_url}/t/{topic.get('slug') or 'topic'}/{topic['id']}",
+            'title': topic.get('title', ''),
+            'pinned': bool(topic.get('pinned')),
+            'views': topic.get('views'),
+            'read': last_read is not None and last_read >= topic.get('highest_post_number', 0),
+        }
+
+    def _cached(self, page):
+        return self.listing_cache.get('latest', page) if self.listing_cache is not None else None
+
+    def next_batch(self):
+        page = self.page
+        result = self._cached(page)
+        if result is not None:
+            logging.info(f"📦 使用其他账号缓存的 latest.json 第 {page} 页")
+        else:
+            if self._prefetch is not None and self._prefetch[0] == page:
+                try:
+                    result = self._prefetch[1].result()
+                except Exception as e:
+                    logging.warning(f"预取第 {page} 页失败，重新请求: {e}")
+            if result is None:
+                result = self.fetch_page(page)
+            if self.listing_cache is not None:
+                self.listing_cache.put('latest', page, *result)
+
+        topics, has_more = result
+        # 翻到底后回到第一页，新帖子总是出现在前面
+        self.exhausted = not (has_more and topics)
+        self.page = 0 if self.exhausted else page + 1
+        self._prefetch = None
+        if self._cached(self.page) is None:
+            self._prefetch = (self.page, self._executor.submit(self.fetch_page, self.page))
+        return topics
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+class Metrics:
+    """Counters and histograms labelled per account, exportable as JSON or Prometheus text"""
+
+    PREFIX = 'discourse_alive'
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+    def __init__(self, **labels):
+        self.labels = labels
+        self.counters = {}
+        self.histograms = {}
+
+    def _key(self, name, labels):
+        merged = dict(self.labels, **labels)
+        return name, tuple(sorted((k, str(v)) for k, v in merged.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def counter(self, name, **labels):
+        return self.counters.get(self._key(name, labels), 0)
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        histogram = self.histograms.setdefault(
+            key, {'buckets': [0] * len(self.BUCKETS), 'sum': 0.0, 'count': 0}
+        )
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                histogram['buckets'][i] += 1
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.observe(name, time.time() - start_time, **labels)
+
+    def snapshot(self):
+        """Plain data that can cross process boundaries and be merged later"""
+        return {
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self.counters.items()
+            ],
+            'histograms': [
+                {'name': name, 'labels': dict(labels), **histogram}
+                for (name, labels), histogram in self.histograms.items()
+            ],
+        }
+
+    def merge(self, snapshot):
+        for item in snapshot.get('counters', []):
+            key = item['name'], tuple(sorted(item['labels'].items()))
+            self.counters[key] = self.counters.get(key, 0) + item['value']
+        for item in snapshot.get('histograms', []):
+            key = item['name'], tuple(sorted(item['labels'].items()))
+            histogram = self.histograms.setdefault(
+                key, {'buckets': [0] * len(self.BUCKETS), 'sum': 0.0, 'count': 0}
+            )
+            histogram['buckets'] = [a + b for a, b in zip(histogram['buckets'], item['buckets'])]
+            histogram['sum'] += item['sum']
+            histogram['count'] += item['count']
+
+    @staticmethod
+    def _format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (
+            (k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for k, v in pairs
+        )
+        return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+    def to_prometheus(self):
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            metric = f"{self.PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (key_name, labels), value in sorted(self.counters.items()):
+                if key_name == name:
+                    lines.append(f"{metric}{self._format_labels(labels)} {value}")
+
+        for name in sorted({name for name, _ in self.histograms}):
+            metric = f"{self.PREFIX}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (key_name, labels), histogram in sorted(self.histograms.items()):
+                if key_name != name:
+                    continue
+                for bound, count in zip(self.BUCKETS, histogram['buckets']):
+                    lines.append(f"{metric}_bucket{self._format_labels(labels, [('le', str(bound))])} {count}")
+                lines.append(f"{metric}_bucket{self._format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+                lines.append(f"{metric}_sum{self._format_labels(labels)} {histogram['sum']:.6f}")
+                lines.append(f"{metric}_count{self._format_labels(labels)} {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        atomic_write_json(path.join(directory, 'metrics.json'), self.snapshot())
+        # node_exporter 的 textfile collector 只读取 .prom 文件，同样先写临时文件再替换
+        prom_path = path.join(directory, f'{self.PREFIX}.prom')
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.prom.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, prom_path)
+
+
+class CommandTracer:
+    """Count and time WebDriver round trips by command and by the method that issued them"""
+
+    # 命令归属到调用栈中最内层的这些方法，其余记为 other
+    CALLERS = frozenset((
+        'create_driver', 'open_with_cookies', 'login', 'load_topics',
+        'reset_to_main_page', 'click_like', 'open_background_tab', 'close_extra_tabs',
+        'browse_topic', 'recycle_driver', 'click_topic', 'run_account',
+    ))
+
+    def __init__(self):
+        self.stats = {}
+
+    def attach(self, driver):
+        executor = driver.command_executor
+        # 复用的浏览器可能已被上个账号的 tracer 包装过，总是从原始方法重新包装
+        execute = getattr(executor, '_untraced_execute', None)
+        if execute is None:
+            execute = executor._untraced_execute = executor.execute
+
+        def traced(command, params):
+            start_time = time.perf_counter()
+            try:
+                return execute(command, params)
+            finally:
+                self.add(self.caller(), self.command_name(command, params), time.perf_counter() - start_time)
+
+        executor.execute = traced
+
+    @staticmethod
+    def command_name(command, params):
+        if command == 'executeCdpCommand' and isinstance(params, dict):
+            return f"{command}:{params.get('cmd')}"
+        return command
+
+    def caller(self):
+        frame = sys._getframe(2)
+        while frame is not None:
+            if frame.f_code.co_name in self.CALLERS:
+                return frame.f_code.co_name
+            frame = frame.f_back
+        return 'other'
+
+    def add(self, caller, command, seconds):
+        stat = self.stats.setdefault((caller, command), [0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += seconds
+        stat[2] = max(stat[2], seconds)
+
+    def rows(self):
+        """Per (caller, command) totals, slowest first"""
+        rows = [
+            {'caller': caller, 'command': command, 'count': count, 'total': total, 'max': longest}
+            for (caller, command), (count, total, longest) in self.stats.items()
+        ]
+        return sorted(rows, key=lambda row: row['total'], reverse=True)
+
+
+class AccountProfiler:
+    """Trace WebDriver commands for one account, optionally under cProfile and tracemalloc"""
+
+    # 报告中保留的 Python 函数和内存分配热点数
+    TOP = 25
+
+    def __init__(self, python=False):
+        self.tracer = CommandTracer()
+        self.python = python
+        self._profiler = None
+        self._snapshot = None
+
+    def __enter__(self):
+        if self.python:
+            import cProfile
+            import tracemalloc
+
+            tracemalloc.start()
+            # 只统计主线程，后台预取 latest.json 的线程不在其中
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profiler is not None:
+            import tracemalloc
+
+            self._profiler.disable()
+            self._snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def result(self):
+        result = {'commands': self.tracer.rows()}
+        if self._profiler is not None:
+            import io
+            import pstats
+
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(self.TOP)
+            result['python'] = out.getvalue()
+            result['memory'] = [str(stat) for stat in self._snapshot.statistics('lineno')[:self.TOP]]
+        return result
+
+
+def format_profile_report(account_info):
+    """Ranked hot-spot report for every profiled account in a run"""
+    lines = [f"DiscourseAlive 性能剖析 {time.strftime('%Y-%m-%d %H:%M:%S')}", ""]
+    by_caller = {}
+    for info in account_info:
+        profile = info.get('profile')
+        if not profile:
+            continue
+        lines.append(f"== {info['domain']} - {info['username']} ==")
+        lines.append("WebDriver 命令（按总耗时排序）：")
+        lines.append(f"  {'调用方':<20} {'命令':<44} {'次数':>6} {'总耗时':>9} {'平均':>8} {'最长':>8}")
+        for row in profile['commands']:
+            lines.append(
+                f"  {row['caller']:<20} {row['command']:<44} {row['count']:>6} "
+                f"{row['total']:>8.2f}s {row['total'] / row['count']:>7.3f}s {row['max']:>7.3f}s"
+            )
+            stat = by_caller.setdefault(row['caller'], [0, 0.0])
+            stat[0] += row['count']
+            stat[1] += row['total']
+        if profile.get('python'):
+            lines.append("")
+            lines.append("Python 热点（cProfile，按累计时间）：")
+            lines.append(profile['python'].rstrip())
+        if profile.get('memory'):
+            lines.append("")
+            lines.append("内存分配热点（tracemalloc）：")
+            lines.extend(f"  {stat}" for stat in profile['memory'])
+        lines.append("")
+
+    lines.append("== 按调用方汇总（所有账号） ==")
+    for caller, (count, total) in sorted(by_caller.items(), key=lambda item: item[1][1], reverse=True):
+        lines.append(f"  {caller:<20} {count:>6} 次 {total:>8.2f}s")
+    return "\n".join(lines) + "\n"
+
+
+class PageWaiter:
+    """Wait on concrete page readiness signals instead of fixed sleeps, timing every wait"""
+
+    POLL_INTERVAL = 0.05
+
+    # 文档加载完成且 Discourse 的加载动画已消失
+    READY_SCRIPT = """
+        if (document.readyState !== 'complete') return false;
+        var spinners = document.querySelectorAll('#main-outlet .spinner, .loading-container .spinner');
+        for (var i = 0; i < spinners.length; i++) {
+            if (spinners[i].offsetParent !== null) return false;
+        }
+        return true;
+    """
+    ROW_COUNT_SCRIPT = "return document.querySelectorAll('#list-area .title').length;"
+
+    def __init__(self, driver, metrics=None, timeouts=None):
+        self.driver = driver
+        self.metrics = metrics
+        self.timeouts = timeouts
+        self.timings = {}
+
+    def record(self, label, seconds):
+        self.timings.setdefault(label, []).append(seconds)
+        if self.metrics is not None:
+            self.metrics.observe('wait', seconds, wait=label)
+
+    def until(self, condition, timeout, label):
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        if self.timeouts is not None:
+            timeout = self.timeouts.get(label, timeout)
+        start_time = time.time()
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=self.POLL_INTERVAL).until(condition)
+        finally:
+            self.record(label, time.time() - start_time)
+
+    def page_ready(self, timeout=20, label='page_ready'):
+        return self.until(lambda driver: driver.execute_script(self.READY_SCRIPT), timeout, label)
+
+    def element(self, locator, timeout=20, label='element', clickable=False):
+        from selenium.webdriver.support import expected_conditions as EC
+
+        condition = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+        return self.until(condition(locator), timeout, label)
+
+    def rows_present(self, timeout=20, label='topic_list'):
+        return self.until(lambda driver: driver.execute_script(self.ROW_COUNT_SCRIPT), timeout, label)
+
+    def route_active(self, path_prefix, timeout=20, label='route'):
+        return self.until(
+            lambda driver: driver.execute_script('return location.pathname').startswith(path_prefix),
+            timeout, label
+        )
+
+    def route_to(self, route_path):
+        """Start a client-side transition; False if Discourse's router is not reachable"""
+        return bool(self.driver.execute_script(SPA_ROUTE_SCRIPT, route_path))
+
+    def topic_ready(self, topic_id, timeout=10, label='spa_topic'):
+        return self.until(lambda driver: driver.execute_script(TOPIC_READY_SCRIPT, topic_id), timeout, label)
+
+    def log_summary(self):
+        if not self.timings:
+            return
+        logging.info("⏱️ 等待耗时统计：")
+        for label, samples in sorted(self.timings.items()):
+            logging.info(
+                f"   - {label}: {len(samples)} 次，共 {sum(samples):.1f} 秒，最长 {max(samples):.2f} 秒"
+            )
+
+
 class TopicLoader:
-    def __init__(self, driver, domain):
+    def __init__(self, driver, domain, discovery='api', seen_index=None, waiter=None, checkpoint=None,
+                 listing_cache=None, navigation='full', load_page=None):
         self.driver = driver
         self.domain = domain
+        self.navigation = navigation
+        # 整页加载交给浏览器对象，沿用学习到的超时和重试；换浏览器后仍指向当前实例
+        self.load_page = load_page or (lambda url, label: self.driver.get(url))
+        self.waiter = waiter or PageWaiter(driver)
+        self.seen_index = seen_index
+        self.checkpoint = checkpoint
+        self.listing_cache = listing_cache
+        # 滚动模式下缓存的列表每个账号只使用一次，之后重新滚动获取更多帖子
+        self._scroll_cache_used = False
+        self._scroll_scale = 1
+        # 最近一批次是否已到列表末尾，只有这时空批次才说明确实没有新帖子
+        self.listing_exhausted = False
         self.daily_requirements = self._load_daily_requirements()
         self.progress = {
             'browse_count': 0,
             'total_time': 0
         }
+        if checkpoint is not None and checkpoint.progress['browse_count']:
+            self.progress.update(checkpoint.progress)
+            logging.info(
+                f"⏯️ 从今日进度继续：已浏览 {self.progress['browse_count']} 个帖子，"
+                f"已阅读 {self.progress['total_time']:.1f} 秒"
+            )
+        self.api_client = None
+        if discovery == 'api':
+            try:
+                self.api_client = LatestTopicsClient(driver, listing_cache=listing_cache)
+            except Exception as e:
+                logging.warning(f"⚠️ 初始化 latest.json 接口失败，改用滚动加载: {e}")
         logging.info(f"🎯 {self.domain} 的每日目标：")
         logging.info(f"   - 需要浏览帖子数：{self.daily_requirements['daily_views']}")
         logging.info(f"   - 需要阅读时间：{self.daily_requirements['daily_time']}秒")
 
     def _load_daily_requirements(self):
-        try:
-            with open('daily_requirements.json', 'r', encoding='utf-8') as f:
-                requirements = json.load(f)
-                if self.domain in requirements:
-                    logging.info(f"✅ 已从配置文件加载 {self.domain} 的要求")
-                    return requirements[self.domain]
-                else:
-                    logging.info(f"⚠️ 未找到 {self.domain} 的配置，使用默认值：100浏览量/200秒")
-                    return {
-                        'daily_views': 50,
-                        'daily_time': 180
-                    }
-        except FileNotFoundError:
-            logging.warning(f"⚠️ 未找到 daily_requirements.json，使用默认值：100浏览量/200秒")
-            return {
-                'daily_views': 50,
-                'daily_time': 180
-            }
-        except json.JSONDecodeError:
-            logging.error(f"❌ daily_requirements.json 格式错误，使用默认值：100浏览量/200秒")
-            return {
-                'daily_views': 50,
-                'daily_time': 180
-            }
+        requirements, configured = daily_requirements_for(self.domain)
+        if configured:
+            logging.info(f"✅ 已从配置文件加载 {self.domain} 的要求")
+        else:
+            logging.info(f"⚠️ 未找到 {self.domain} 的配置，使用默认值：50浏览量/180秒")
+        return requirements
 
     def has_met_requirements(self):
         req = self.daily_requirements
-        views_met = self.progress['browse_count'] >= req['daily_views']
-        time_met = self.progress['total_time'] >= req['daily_time']
+        met = requirements_met(req, self.progress)
 
-        if views_met and time_met:
+        if met:
             logging.info("✅ 已达到所有要求！")
             logging.info(f"   - 浏览量：{self.progress['browse_count']}/{req['daily_views']}")
             logging.info(f"   - 阅读时间：{self.progress['total_time']:.1f}/{req['daily_time']}秒")
 
-        return views_met and time_met
+        return met
 
-    def remaining_requirements(self):
+    def remaining_requirements(self, verbose=True):
         req = self.daily_requirements
         remaining = {
             'views': max(0, req['daily_views'] - self.progress['browse_count']),
             'time': max(0, req['daily_time'] - self.progress['total_time'])
         }
+        if not verbose:
+            return remaining
 
         logging.info("📊 当前进度：")
         logging.info(f"   - 已浏览：{self.progress['browse_count']}/{req['daily_views']} 个帖子")
@@ -189,43 +1859,407 @@ class TopicLoader:
         return remaining
 
     def load_topics(self, scroll_duration=5):
-        """Load topics by scrolling the page"""
-        logging.info(f"📜 开始滚动加载帖子，持续 {scroll_duration} 秒...")
-        end_time = time.time() + scroll_duration
-        actions = ActionChains(self.driver)
+        """Load topics that have not been visited or skipped yet, unread ones first"""
+        self.listing_exhausted = False
+        topics = self._discover_topics(scroll_duration * self._scroll_scale)
+        if self.seen_index is not None:
+            unseen = self.seen_index.filter_unseen(topics)
+            if len(unseen) < len(topics):
+                logging.info(f"🗂️ 过滤掉 {len(topics) - len(unseen)} 个已处理过的帖子")
+            topics = unseen
+        return sorted(topics, key=lambda t: bool(t.get('read')))
+
+    def mark_topic(self, topic, status):
+        if self.seen_index is not None:
+            self.seen_index.mark(topic.get('id'), status)
+
+    def is_liked(self, topic):
+        return self.seen_index is not None and topic.get('id') in self.seen_index.liked
+
+    def mark_liked(self, topic):
+        if self.seen_index is not None:
+            self.seen_index.mark_liked(topic.get('id'))
+
+    def _discover_topics(self, scroll_duration):
+        if self.api_client is not None:
+            page = self.api_client.page
+            try:
+                # Discourse 会轮换会话 Cookie，每批次前同步一次
+                self.api_client.sync_cookies(self.driver)
+                topics = self.api_client.next_batch()
+                self.listing_exhausted = self.api_client.exhausted
+                logging.info(f"✨ 从 latest.json 第 {page} 页获取到 {len(topics)} 个帖子")
+                return topics
+            except Exception as e:
+                logging.warning(f"⚠️ latest.json 获取失败，改用滚动加载: {e}")
+                self.api_client.close()
+                self.api_client = None
+
+        if self.listing_cache is not None and not self._scroll_cache_used:
+            self._scroll_cache_used = True
+            cached = self.listing_cache.get('scroll')
+            if cached is not None:
+                logging.info(f"📦 使用其他账号缓存的帖子列表（{len(cached[0])} 个帖子）")
+                return cached[0]
+
+        topics = self.scroll_topics(scroll_duration)
+        if self.listing_cache is not None and topics:
+            self.listing_cache.put('scroll', 0, topics)
+        return topics
+
+    def scroll_topics(self, scroll_duration=5):
+        """Scroll in-page until enough unseen topics are listed or the list stops growing"""
+        from selenium.common.exceptions import TimeoutException
 
-        while time.time() < end_time:
-            actions.scroll_by_amount(0, 500).perform()
-            time.sleep(0.1)
+        target = self.scroll_target()
+        seen_ids = list(self.seen_index.seen) if self.seen_index is not None else []
+        logging.info(f"📜 开始滚动加载帖子，目标 {target} 个未浏览帖子，最长 {scroll_duration} 秒...")
 
-        topics = self.driver.find_elements(By.CSS_SELECTOR, "#list-area .title")
+        self.driver.set_script_timeout(scroll_duration + 10)
+        start_time = time.time()
+        try:
+            state = self.driver.execute_async_script(
+                SCROLL_UNTIL_SCRIPT, target, seen_ids, int(scroll_duration * 1000), SCROLL_IDLE_MS
+            )
+            reasons = {'target': '已达到目标数量', 'exhausted': '列表没有更多帖子', 'timeout': '达到最长滚动时间'}
+            # 已放大到最长滚动时间仍未到底，同样视为能加载的帖子已经看完
+            self.listing_exhausted = state['reason'] == 'exhausted' or (
+                state['reason'] == 'timeout' and self._scroll_scale >= MAX_SCROLL_SCALE
+            )
+            if state['reason'] == 'timeout' and not state['unseen']:
+                # 滚动每次都从列表顶部开始，未到底就需要滚得更久才能看到更早的帖子
+                self._scroll_scale = min(self._scroll_scale * 2, MAX_SCROLL_SCALE)
+            logging.info(
+                f"📜 滚动结束（{reasons.get(state['reason'], state['reason'])}）："
+                f"{state['rows']} 行，其中 {state['unseen']} 个未浏览"
+            )
+        except TimeoutException:
+            logging.warning("滚动脚本执行超时")
+        finally:
+            self.waiter.record('scroll_load', time.time() - start_time)
+
+        topics = self.extract_topics()
         logging.info(f"✨ 本次加载到 {len(topics)} 个帖子")
         return topics
 
+    def scroll_target(self):
+        """Number of unseen topics still needed to meet today's views and reading time"""
+        remaining = self.remaining_requirements(verbose=False)
+        by_time = int(-(-remaining['time'] // AVERAGE_DWELL_TIME))
+        return max(remaining['views'], by_time, 1)
+
+    def extract_topics(self):
+        """Extract topic records (id, url, title, pinned, views, read) in one round trip"""
+        records = self.driver.execute_script(TOPIC_EXTRACT_SCRIPT) or []
+        # 同一帖子可能因无限滚动重复出现，按 id/url 去重并保持顺序
+        seen = set()
+        topics = []
+        for record in records:
+            key = record.get('id') or record.get('url')
+            if not record.get('url') or key in seen:
+                continue
+            seen.add(key)
+            topics.append(record)
+        return topics
+
     def update_progress(self, browse_time):
         """Update progress after viewing a topic"""
         self.progress['browse_count'] += 1
         self.progress['total_time'] += browse_time
+        if self.checkpoint is not None:
+            self.checkpoint.save(self.progress)
         logging.info("📈 更新进度：")
         logging.info(f"   - 总浏览量：{self.progress['browse_count']}")
         logging.info(f"   - 总阅读时间：{self.progress['total_time']:.1f}秒")
 
     def reset_to_main_page(self):
         """Return to the main forum page to load more topics"""
+        if self.api_client is not None:
+            # 接口模式直接翻页，无需重新加载页面
+            logging.info("🔄 继续从 latest.json 获取下一页帖子")
+            return
+        from selenium.common.exceptions import TimeoutException
+
+        if self.navigation == 'spa':
+            # 同一个标签页刚看完帖子，通过前端路由回到列表，不重新启动 Ember 应用
+            try:
+                if self.waiter.route_to('/latest'):
+                    self.waiter.route_active('/latest', timeout=10, label='spa_route')
+                    self.waiter.rows_present(timeout=10, label='reload_rows')
+                    logging.info("✅ 已通过前端路由返回帖子列表")
+                    return
+            except TimeoutException:
+                pass
+            logging.warning("前端路由返回列表失败，改用完整加载")
+
         logging.info("🔄 返回主页重新加载帖子...")
         current_url = self.driver.current_url
         base_url = current_url.split('?')[0].split('#')[0]
-        self.driver.get(base_url)
-        time.sleep(2)  # Wait for page to load
+        if self.navigation == 'spa':
+            parsed = urlparse(current_url)
+            base_url = f"{parsed.scheme}://{parsed.netloc}/latest"
+        self.load_page(base_url, 'reload')
+        try:
+            self.waiter.page_ready(label='reload_ready')
+            self.waiter.rows_present(timeout=10, label='reload_rows')
+        except TimeoutException:
+            logging.warning("等待帖子列表超时")
         logging.info("✅ 页面重新加载完成")
 
+    def attach(self, driver, waiter):
+        """Continue with a replacement browser, keeping progress and discovery state"""
+        self.driver = driver
+        self.waiter = waiter
+
+    def close(self):
+        if self.api_client is not None:
+            self.api_client.close()
+            self.api_client = None
+        if self.seen_index is not None:
+            self.seen_index.close()
+            self.seen_index = None
+        if self.listing_cache is not None:
+            self.listing_cache.close()
+            self.listing_cache = None
+
+
+def process_tree_rss(pid):
+    """RSS in bytes of pid and all of its descendants"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return 0
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    # 没有 psutil 时读取 /proc（仅 Linux）
+    if not os.path.isdir('/proc'):
+        return 0
+    children = {}
+    rss = {}
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+            rss[int(entry)] = int(fields[21]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+class MemoryWatchdog:
+    """Track Chrome's memory between topics and tell when the browser should be replaced"""
+
+    MB = 1024 * 1024
+
+    def __init__(self, memory_limit_mb=0, js_heap_limit_mb=0):
+        self.memory_limit = memory_limit_mb * self.MB
+        self.js_heap_limit = js_heap_limit_mb * self.MB
+        self.peak_rss = 0
+        self.peak_js_heap = 0
+
+    @staticmethod
+    def browser_rss(driver):
+        # Chrome 是 chromedriver 的子进程，统计整个进程树（含渲染进程）
+        try:
+            return process_tree_rss(driver.service.process.pid)
+        except AttributeError:
+            return 0
+
+    @staticmethod
+    def attach(driver):
+        """Enable the Performance domain once per browser instead of before every sample"""
+        try:
+            driver.execute_cdp_cmd('Performance.enable', {})
+        except Exception as e:
+            logging.debug(f"启用 Performance 域失败: {e}")
+
+    @staticmethod
+    def js_heap(driver):
+        try:
+            result = driver.execute_cdp_cmd('Performance.getMetrics', {})
+        except Exception as e:
+            logging.debug(f"读取 JS 堆大小失败: {e}")
+            return 0
+        for metric in result.get('metrics', []):
+            if metric.get('name') == 'JSHeapUsedSize':
+                return int(metric.get('value', 0))
+        return 0
+
+    def sample(self, driver):
+        """Return (rss, js_heap) in bytes and update the peaks"""
+        rss = self.browser_rss(driver)
+        heap = self.js_heap(driver)
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_js_heap = max(self.peak_js_heap, heap)
+        return rss, heap
+
+    def exceeded(self, driver):
+        """Sample once and return a reason if a limit is crossed, else None"""
+        rss, heap = self.sample(driver)
+        if self.memory_limit and rss > self.memory_limit:
+            return f"浏览器内存 {rss / self.MB:.0f}MB 超过上限 {self.memory_limit / self.MB:.0f}MB"
+        if self.js_heap_limit and heap > self.js_heap_limit:
+            return f"JS 堆 {heap / self.MB:.0f}MB 超过上限 {self.js_heap_limit / self.MB:.0f}MB"
+        return None
+
+
+class DriverPool:
+    """Keep a warm Chrome ready for the next account and reuse browsers between accounts
+
+    Browsers are launched for a key (the domain whose disk cache they use, or None when
+    the cache is off) and are only reused for accounts with the same key.
+    """
+
+    def __init__(self, factory, max_uses=5, on_quit=None, perf_log=False):
+        self.factory = factory
+        self.max_uses = max_uses
+        self.on_quit = on_quit
+        # 浏览器开启了性能日志时，交给下个账号前要清空未读取的网络事件
+        self.perf_log = perf_log
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+        self._idle = None
+        self._uses = {}
+        self._keys = {}
+
+    def _launch(self, key=None):
+        start_time = time.time()
+        driver = self.factory(key)
+        self._keys[id(driver)] = key
+        return driver, time.time() - start_time
+
+    def prelaunch(self, current=None, key=None):
+        """Start the next browser in the background unless the current one will be reused"""
+        if self._pending is not None or self._idle is not None:
+            return
+        if (current is not None and self._keys.get(id(current)) == key
+                and self._uses.get(id(current), 0) + 1 < self.max_uses):
+            return
+        logging.info("🔥 后台预启动下一个浏览器")
+        self._pending = (self._executor.submit(self._launch, key), key)
+
+    def acquire(self, key=None):
+        """Return (driver, startup_seconds); startup only counts the time actually waited"""
+        start_time = time.time()
+        if self._idle is not None:
+            driver, self._idle = self._idle, None
+            if self._keys.get(id(driver)) == key:
+                logging.info(f"♻️ 复用已有浏览器（第 {self._uses.get(id(driver), 0) + 1} 次使用）")
+                return driver, time.time() - start_time
+            self.discard(driver)
+
+        if self._pending is not None:
+            (future, pending_key), self._pending = self._pending, None
+            try:
+                driver, _ = future.result()
+                if pending_key == key:
+                    logging.info("🔥 使用预启动的浏览器")
+                    return driver, time.time() - start_time
+                self.discard(driver)
+            except Exception as e:
+                logging.warning(f"预启动浏览器失败，重新启动: {e}")
+
+        driver, _ = self._launch(key)
+        return driver, time.time() - start_time
+
+    def discard(self, driver):
+        """Quit a browser that must not be reused"""
+        self._uses.pop(id(driver), None)
+        self._quit(driver)
+
+    def release(self, driver, origins=()):
+        """Reset a used browser for the next account, or quit it once it is worn out"""
+        uses = self._uses.pop(id(driver), 0) + 1
+        if uses < self.max_uses and self._idle is None and self._reset(driver, origins):
+            self._uses[id(driver)] = uses
+            self._idle = driver
+            return
+        self._quit(driver)
+
+    def _reset(self, driver, origins):
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            # 'all' 不包含 HTTP 磁盘缓存，同域名的静态资源缓存会保留给下个账号
+            for origin in origins:
+                driver.execute_cdp_cmd('Storage.clearDataForOrigin', {
+                    'origin': origin,
+                    'storageTypes': 'all'
+                })
+            driver.get('about:blank')
+            if self.perf_log:
+                # 不拦截资源的账号不会读取性能日志，残留事件会被算进下个账号的流量统计
+                driver.get_log('performance')
+            return True
+        except Exception as e:
+            logging.warning(f"重置浏览器失败，将关闭该实例: {e}")
+            return False
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        self._keys.pop(id(driver), None)
+        if self.on_quit is not None:
+            self.on_quit(driver)
+
+    def close(self):
+        if self._idle is not None:
+            self._quit(self._idle)
+            self._idle = None
+        if self._pending is not None:
+            try:
+                driver, _ = self._pending[0].result()
+                self._quit(driver)
+            except Exception:
+                pass
+            self._pending = None
+        self._uses.clear()
+        self._executor.shutdown(wait=False)
+
 
 class LinuxDoBrowser:
-    def __init__(self) -> None:
+    # 每个帖子的停留时间范围（秒）
+    DWELL_RANGE = (5, 10)
+    # 页面加载超时后的总尝试次数、重试前的退避基数（秒），以及重试时超时的放大倍数
+    PAGE_LOAD_ATTEMPTS = 2
+    RETRY_BACKOFF = 1.0
+    RETRY_TIMEOUT_FACTOR = 2
+
+    def __init__(self, config=None, worker=False, run_id=None) -> None:
+        from selenium import webdriver
+
         logging.info("启动 Selenium")
+        self.config = config or load_config()
 
-        global chrome_options
-        chrome_options = webdriver.ChromeOptions()
+        self.chrome_options = chrome_options = webdriver.ChromeOptions()
 
         # 青龙面板特定的 Chrome 选项
         chrome_options.add_argument("--no-sandbox")
@@ -252,33 +2286,107 @@ class LinuxDoBrowser:
         # 设置页面加载策略
         chrome_options.page_load_strategy = 'normal'
 
+        # 有账户启用资源拦截时，通过性能日志统计被拦截的请求；
+        # 队列模式下要浏览的账户来自队列，事先无法知道，总是开启
+        self.perf_log = worker or any(RESOURCE_PROFILES[acc.resource_profile] for acc in self.config.accounts)
+        if self.perf_log:
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+            chrome_options.add_experimental_option('perfLoggingPrefs', {
+                'enableNetwork': True,
+                'enablePage': False
+            })
+
         # 检查 chromedriver 路径
-        global chromedriver_path
-        chromedriver_path = shutil.which("chromedriver")
+        self.chromedriver_path = shutil.which("chromedriver")
 
-        if not chromedriver_path:
+        if not self.chromedriver_path:
             logging.error("chromedriver 未找到，请确保已安装并配置正确的路径。")
             exit(1)
 
         self.driver = None
-
-    def create_driver(self):
+        self.browser_cache = BrowserCache(self.config.browser_cache_dir, self.config.browser_cache_mb)
+        if self.config.browser_cache_dir and fcntl is None:
+            logging.warning("当前平台不支持文件锁，未启用共享磁盘缓存")
+        self.browser_cache.prune()
+        self.driver_pool = DriverPool(
+            self.launch_driver, max_uses=self.config.driver_max_uses, on_quit=self.browser_cache.release,
+            perf_log=self.perf_log
+        )
+        self.session_cache = SessionCache(self.config.session_cache_dir, self.config.session_cache_hours)
+        self.startup_time = 0
+        self.waiter = None
+        self.resource_policy = ResourcePolicy()
+        self.metrics = Metrics()
+        self.watchdog = MemoryWatchdog()
+        self.navigation = 'full'
+        self.checkpoint = None
+        self.deadline = None
+        self.budget_exhausted = False
+        # 列表中已没有可浏览的新帖子、提前放弃当前账号时的原因
+        self.gave_up = None
+        self.tracer = None
+        self.timeouts = None
+        self.consecutive_failures = 0
+        # 本次运行中已熔断的域名及原因；并发时各工作进程通过状态数据库按 run_id 共享
+        self.run_id = run_id or f"{socket.gethostname()}:{os.getpid()}:{time.time():.0f}"
+        self.open_circuits = {}
+
+    def launch_driver(self, cache_domain=None):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        options = self.chrome_options
+        cache = self.browser_cache.acquire(cache_domain) if cache_domain else None
+        if cache is not None:
+            options = copy.deepcopy(options)
+            for argument in self.browser_cache.chrome_arguments(cache[0]):
+                options.add_argument(argument)
+
+        service = Service(self.chromedriver_path)
         try:
-            service = Service(chromedriver_path)
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            driver = webdriver.Chrome(service=service, options=options)
+        except Exception:
+            if cache is not None:
+                os.close(cache[1])
+            raise
+        if cache is not None:
+            self.browser_cache.hold(driver, cache[1])
 
-            # 删除 navigator.webdriver 标志
-            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+        try:
+            # 删除 navigator.webdriver 标志（对之后打开的所有页面生效，复用浏览器时无需重复注入）
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
                 'source': '''
                     Object.defineProperty(navigator, 'webdriver', {
                         get: () => undefined
                     })
                 '''
             })
+        except Exception:
+            # Chrome 已经启动，失败时要退出进程并释放缓存目录的锁
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            self.browser_cache.release(driver)
+            raise
+        return driver
 
-            # 设置页面加载超时
-            self.driver.set_page_load_timeout(30)
-            self.driver.implicitly_wait(10)
+    def create_driver(self, domain=None):
+        try:
+            self.driver, self.startup_time = self.driver_pool.acquire(self.browser_cache.key(domain))
+            self.metrics.observe('phase', self.startup_time, phase='driver_startup')
+            logging.info(f"⏱️ 浏览器就绪，耗时 {self.startup_time:.1f} 秒")
+
+            # 设置页面加载超时（复用的浏览器可能残留上个账号的设置）
+            self.driver.set_page_load_timeout(self.timeout_for('navigation', 30))
+            # 关闭隐式等待：查找不存在的元素立即返回，需要等待的地方显式等待具体信号
+            self.driver.implicitly_wait(0)
+            self.waiter = PageWaiter(self.driver, self.metrics, self.timeouts)
+            if self.tracer is not None:
+                self.tracer.attach(self.driver)
+            self.resource_policy.apply(self.driver)
+            # 看门狗只在主标签页采样，启用一次即可
+            self.watchdog.attach(self.driver)
 
             return True
 
@@ -286,6 +2394,31 @@ class LinuxDoBrowser:
             logging.error(f"创建 WebDriver 失败: {e}")
             return False
 
+    def timeout_for(self, label, default):
+        return self.timeouts.get(label, default) if self.timeouts is not None else default
+
+    def load_page(self, url, label='page_load', default_timeout=30):
+        """driver.get with a learned timeout; a timeout is retried with backoff and a longer limit"""
+        from selenium.common.exceptions import TimeoutException
+
+        timeout = self.timeout_for(label, default_timeout)
+        for attempt in range(self.PAGE_LOAD_ATTEMPTS):
+            self.driver.set_page_load_timeout(timeout)
+            start_time = time.time()
+            try:
+                self.driver.get(url)
+                return
+            except TimeoutException:
+                self.metrics.inc('timeouts', phase=label)
+                if attempt + 1 >= self.PAGE_LOAD_ATTEMPTS:
+                    raise
+                delay = self.RETRY_BACKOFF * 2 ** attempt * random.uniform(1, 1.5)
+                logging.warning(f"页面加载超时（{timeout:.1f} 秒），{delay:.1f} 秒后重试")
+                time.sleep(delay)
+                timeout = min(timeout * self.RETRY_TIMEOUT_FACTOR, default_timeout * 3)
+            finally:
+                self.waiter.record(label, time.time() - start_time)
+
     def simulate_typing(self, element, text, typing_speed=0.1, random_delay=True):
         for char in text:
             element.send_keys(char)
@@ -294,63 +2427,145 @@ class LinuxDoBrowser:
             else:
                 time.sleep(typing_speed)
 
-    def login(self) -> bool:
+    def sign_in(self, forum_url, domain) -> bool:
+        """Open the forum with the cached session if there is one, otherwise run the full login"""
+        cookies = self.session_cache.load(domain, self.username)
+        if cookies:
+            logging.info(f"🍪 尝试使用缓存的会话：{self.username}")
+        state = self.open_with_cookies(forum_url, cookies)
+        if state == 'in':
+            logging.info("登录成功（会话缓存）")
+            return True
+
+        if cookies:
+            logging.info("会话已失效，重新登录")
+            self.session_cache.drop(domain, self.username)
+            self.driver.delete_all_cookies()
+        # 已显示登录按钮的页面直接用来登录，加载失败时才重新打开
+        if state != 'out':
+            self.load_page(forum_url, 'navigation')
+        if not self.login():
+            return False
+
+        self.save_session(domain)
+        return True
+
+    def save_session(self, domain):
+        """Write the browser's current cookies back; Discourse rotates _t while the session is in use"""
         try:
-            logging.info(f"--- 开始尝试登录：{self.username}---")
+            self.session_cache.save(domain, self.username, self.driver.get_cookies())
+        except Exception as e:
+            logging.warning(f"保存会话缓存失败: {e}")
+
+    def open_with_cookies(self, forum_url, cookies):
+        """Load forum_url once with cookies set beforehand; returns 'in', 'out' or None if unknown"""
+        from selenium.common.exceptions import TimeoutException, WebDriverException
 
-            # 先等待页面加载完成
-            WebDriverWait(self.driver, 20).until(
-                lambda driver: driver.execute_script('return document.readyState') == 'complete'
+        try:
+            if cookies:
+                # 通过 CDP 在打开页面之前写入 Cookie，第一次加载就带上会话，不必先打开一次页面
+                try:
+                    self.driver.execute_cdp_cmd('Network.setCookies', {
+                        'cookies': [SessionCache.to_cdp(cookie, forum_url) for cookie in cookies]
+                    })
+                except WebDriverException as e:
+                    logging.warning(f"写入缓存的 Cookie 失败: {e}")
+            self.load_page(forum_url, 'navigation')
+
+            # Ember 渲染完成后才会出现头像或登录按钮，二者之一出现即可判断状态
+            state = self.waiter.until(
+                lambda driver: driver.execute_script(
+                    "if (document.querySelector('#current-user')) return 'in';"
+                    "if (document.querySelector('.login-button')) return 'out';"
+                    "return null;"
+                ),
+                20, 'session_check'
             )
+        except (TimeoutException, WebDriverException) as e:
+            logging.warning(f"验证会话失败: {e}")
+            state = None
+        return state
+
+    def recycle_driver(self, topic_loader, reason):
+        """Swap in a fresh browser mid-account, carrying the login over via cookies"""
+        logging.warning(f"🧹 {reason}，更换浏览器后继续浏览")
+        old_driver, self.driver = self.driver, None
+        timings = self.waiter.timings
+        try:
+            cookies = [
+                {k: v for k, v in cookie.items() if k in SessionCache.COOKIE_FIELDS}
+                for cookie in old_driver.get_cookies()
+            ]
+            self.resource_policy.collect(old_driver)
+        except Exception as e:
+            # 旧浏览器已无响应时拿不到 Cookie，换新浏览器后重新登录
+            logging.warning(f"读取旧浏览器的 Cookie 失败: {e}")
+            cookies = []
+        finally:
+            self.driver_pool.discard(old_driver)
+        self.metrics.inc('driver_recycles')
+
+        startup_time = self.startup_time
+        if not self.create_driver(urlparse(self.forum_url).netloc):
+            raise RecycleError("更换浏览器失败")
+        self.startup_time += startup_time
+        self.waiter.timings = timings
 
-            # 确保在点击之前页面已完全加载
-            time.sleep(3)
+        try:
+            state = self.open_with_cookies(self.forum_url, cookies)
+            if state != 'in':
+                logging.info("Cookie 未能恢复登录状态，重新登录")
+                self.driver.delete_all_cookies()
+                if state != 'out':
+                    self.load_page(self.forum_url, 'navigation')
+                if not self.login():
+                    raise RecycleError("更换浏览器后登录失败")
+        except RecycleError:
+            raise
+        except Exception as e:
+            raise RecycleError(f"更换浏览器后打开论坛失败: {e}") from e
+        topic_loader.attach(self.driver, self.waiter)
+        logging.info("✅ 已切换到新的浏览器")
 
-            try:
-                login_button = WebDriverWait(self.driver, 20).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, ".login-button .d-button-label"))
-                )
-                self.driver.execute_script("arguments[0].click();", login_button)
-            except:
-                logging.info("尝试备用登录按钮选择器")
-                login_button = WebDriverWait(self.driver, 20).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button.login-button"))
-                )
-                self.driver.execute_script("arguments[0].click();", login_button)
+    def login(self) -> bool:
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
 
-            # 等待登录表单出现
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.ID, "login-form"))
+        try:
+            logging.info(f"--- 开始尝试登录：{self.username}---")
+
+            # 等待页面加载完成且 Ember 渲染出登录按钮
+            self.waiter.page_ready(label='login_page')
+            login_button = self.waiter.until(
+                EC.any_of(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, ".login-button .d-button-label")),
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button.login-button")),
+                ),
+                20, 'login_button'
             )
+            self.driver.execute_script("arguments[0].click();", login_button)
+
+            # 等待登录表单出现
+            self.waiter.element((By.ID, "login-form"), label='login_form')
 
             # 输入用户名
-            username_field = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.ID, "login-account-name"))
-            )
+            username_field = self.waiter.element((By.ID, "login-account-name"), label='login_form')
             username_field.clear()
-            time.sleep(1)
             self.simulate_typing(username_field, self.username)
 
             # 输入密码
-            password_field = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.ID, "login-account-password"))
-            )
+            password_field = self.waiter.element((By.ID, "login-account-password"), label='login_form')
             password_field.clear()
-            time.sleep(1)
             self.simulate_typing(password_field, self.password)
 
             # 提交登录
-            submit_button = WebDriverWait(self.driver, 20).until(
-                EC.element_to_be_clickable((By.ID, "login-button"))
-            )
-            time.sleep(1)
+            submit_button = self.waiter.element((By.ID, "login-button"), label='login_submit', clickable=True)
             self.driver.execute_script("arguments[0].click();", submit_button)
 
             # 验证登录结果
             try:
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "#current-user"))
-                )
+                self.waiter.element((By.CSS_SELECTOR, "#current-user"), timeout=15, label='login_result')
                 logging.info("登录成功")
                 return True
             except TimeoutException:
@@ -372,12 +2587,27 @@ class LinuxDoBrowser:
             return False
 
     def click_topic(self):
+        topic_loader = None
         try:
-            topic_loader = TopicLoader(self.driver, urlparse(self.driver.current_url).netloc)
+            domain = urlparse(self.driver.current_url).netloc
+            seen_index = SeenTopicIndex(
+                self.config.state_db, domain, self.username, self.config.seen_retention_days
+            )
+            listing_cache = None
+            if self.config.listing_cache_seconds:
+                listing_cache = ListingCache(self.config.state_db, domain, self.config.listing_cache_seconds)
+            topic_loader = TopicLoader(
+                self.driver, domain, discovery=self.discovery, seen_index=seen_index,
+                waiter=self.waiter, checkpoint=self.checkpoint, listing_cache=listing_cache,
+                navigation=self.navigation, load_page=self.load_page
+            )
+            empty_batches = 0
+            topic_seconds = 0
 
-            while not topic_loader.has_met_requirements():
+            while not topic_loader.has_met_requirements() and not self.out_of_budget():
                 logging.info("--- 开始滚动页面加载更多帖子 ---")
-                topics = topic_loader.load_topics(self.scroll_duration)
+                with self.metrics.timer('phase', phase='discovery'):
+                    topics = topic_loader.load_topics(self.scroll_duration)
                 total_topics = len(topics)
                 remaining = topic_loader.remaining_requirements()
 
@@ -385,195 +2615,682 @@ class LinuxDoBrowser:
                 logging.info(f"还需要浏览 {remaining['views']} 个帖子，累计阅读时间还差 {remaining['time']} 秒")
 
                 if total_topics == 0:
-                    logging.warning("没有找到任何帖子，将重新加载页面")
+                    # 接口模式每批次前进一页，滚动模式会加长滚动时间；只有列表确实到底才计数
+                    if topic_loader.listing_exhausted:
+                        empty_batches += 1
+                        if empty_batches >= MAX_EMPTY_BATCHES:
+                            logging.warning(f"列表已到底，连续 {empty_batches} 次没有找到未浏览的帖子，停止浏览")
+                            self.gave_up = (
+                                "帖子列表中没有更多未浏览的帖子，今日目标未完成"
+                                f"（{topic_loader.progress['browse_count']}/"
+                                f"{topic_loader.daily_requirements['daily_views']}）"
+                            )
+                            break
+                        logging.warning("列表已到底且没有未浏览的帖子，将重新加载页面")
+                    else:
+                        logging.warning("本批次没有未浏览的帖子，继续加载更多")
                     topic_loader.reset_to_main_page()
                     continue
+                empty_batches = 0
+
+                candidates = []
+                for topic in topics:
+                    if topic['pinned']:
+                        logging.info(f"跳过置顶的帖子：{topic['title']}")
+                        topic_loader.mark_topic(topic, 'skipped')
+                    elif topic['views'] is None:
+                        logging.warning(f"无法解析浏览次数，跳过该帖子: {topic['title']}")
+                        topic_loader.mark_topic(topic, 'skipped')
+                    else:
+                        candidates.append(topic)
+
+                prefetched = None
+                try:
+                    for idx, topic in enumerate(candidates):
+                        if topic_loader.has_met_requirements():
+                            logging.info("已达到每日要求，停止浏览")
+                            break
+                        if self.out_of_budget(topic_seconds):
+                            break
+
+                        handle, prefetched = prefetched, None
+                        next_topic = None
+                        # SPA 模式只用一个标签页，不预加载
+                        prefetch = self.config.topic_prefetch and self.navigation != 'spa'
+                        if prefetch and idx + 1 < len(candidates):
+                            next_topic = candidates[idx + 1]
+
+                        logging.info(f"打开第 {idx + 1}/{len(candidates)} 个帖子 ：{topic['title']}")
+                        topic_start_time = time.time()
+                        try:
+                            prefetched = self.browse_topic(topic_loader, topic, handle, next_topic)
+                        except Exception as e:
+                            logging.error(f"处理帖子 {idx + 1} 时发生错误: {e}")
+                        topic_seconds = time.time() - topic_start_time
+
+                        limit = self.config.max_consecutive_failures
+                        if limit and self.consecutive_failures >= limit:
+                            raise CircuitOpenError(f"连续 {self.consecutive_failures} 个帖子处理失败，停止当前账号")
+
+                        # 长时间运行后 Chrome 内存持续增长，超过上限时换用新浏览器
+                        reason = self.watchdog.exceeded(self.driver)
+                        if reason:
+                            prefetched = None
+                            self.recycle_driver(topic_loader, reason)
+                finally:
+                    if self.driver is not None:
+                        self.close_extra_tabs()
+
+                if self.budget_exhausted:
+                    break
+                if not topic_loader.has_met_requirements():
+                    logging.info("当前页面帖子已处理完，但未达到要求，将重新加载页面")
+                    topic_loader.reset_to_main_page()
 
-                for idx, topic in enumerate(topics):
-                    if topic_loader.has_met_requirements():
-                        logging.info("已达到每日要求，停止浏览")
-                        break
-
-                    try:
-                        parent_element = topic.find_element(By.XPATH, "./ancestor::tr")
-
-                        is_pinned = parent_element.find_elements(
-                            By.CSS_SELECTOR, ".topic-statuses .pinned"
-                        )
-
-                        if is_pinned:
-                            logging.info(f"跳过置顶的帖子：{topic.text.strip()}")
-                            continue
+            if not self.budget_exhausted and not self.gave_up:
+                logging.info("所有要求已完成")
 
-                        views_element = parent_element.find_element(
-                            By.CSS_SELECTOR, ".num.views .number"
-                        )
-                        views_title = views_element.get_attribute("title")
+        except (CircuitOpenError, RecycleError):
+            raise
+        except Exception as e:
+            logging.error(f"click_topic 方法发生错误: {e}")
+            self.gave_up = f"浏览过程中出错: {e}"
+        finally:
+            if topic_loader is not None:
+                topic_loader.close()
+
+    def out_of_budget(self, next_seconds=0):
+        """True once the account's deadline leaves no room for another topic"""
+        if self.budget_exhausted:
+            return True
+        if self.deadline is None or time.time() + next_seconds < self.deadline:
+            return False
+        self.budget_exhausted = True
+        logging.warning("⌛ 当前账号的时间预算已用完，不再开始新的帖子，剩余进度留到下次运行")
+        return True
 
-                        if "此话题已被浏览 " in views_title and " 次" in views_title:
-                            views_count_str = views_title.split("此话题已被浏览 ")[1].split(" 次")[0]
-                            views_count = int(views_count_str.replace(",", ""))
-                        else:
-                            logging.warning(f"无法解析浏览次数，跳过该帖子: {views_title}")
-                            continue
+    def browse_topic(self, topic_loader, topic, handle=None, next_topic=None):
+        """Read one topic in its own tab; returns the tab prefetching next_topic, if any"""
+        from selenium.common.exceptions import TimeoutException
 
-                        article_title = topic.text.strip()
-                        logging.info(f"打开第 {idx + 1}/{total_topics} 个帖子 ：{article_title}")
-                        article_url = topic.get_attribute("href")
+        article_title = topic['title']
+        views_count = topic['views']
+        main_handle = self.driver.window_handles[0]
+        next_handle = None
 
-                        try:
-                            self.driver.execute_script("window.open('');")
-                            self.driver.switch_to.window(self.driver.window_handles[-1])
-
-                            browse_start_time = time.time()
-                            self.driver.set_page_load_timeout(10)
-                            try:
-                                self.driver.get(article_url)
-                            except TimeoutException:
-                                logging.warning(f"加载帖子超时: {article_title}")
-                                raise
-
-                            global browse_count
-                            browse_count += 1
-
-                            if views_count > self.view_count:
-                                logging.info(f"📈 当前帖子浏览量为{views_count} 大于设定值 {self.view_count}，🥳 开始进行点赞操作")
-                                self.click_like()
-
-                            scroll_duration = random.uniform(5, 10)
-                            try:
-                                while time.time() - browse_start_time < scroll_duration:
-                                    self.driver.execute_script(
-                                        "window.scrollBy(0, window.innerHeight);"
-                                    )
-                                    time.sleep(1)
-                            except Exception as e:
-                                logging.warning(f"在滚动过程中发生错误: {e}")
-
-                            browse_end_time = time.time()
-                            total_browse_time = browse_end_time - browse_start_time
-                            topic_loader.update_progress(total_browse_time)
-                            logging.info(f"浏览该帖子时间: {total_browse_time:.2f}秒")
+        try:
+            browse_start_time = time.time()
+            try:
+                if handle is not None:
+                    # 预取的标签页通常已加载完毕，只需确认加载状态
+                    self.driver.switch_to.window(handle)
+                    self.waiter.until(
+                        lambda driver: driver.execute_script('return document.readyState') == 'complete',
+                        10, 'prefetched_page'
+                    )
+                elif self.navigation == 'spa':
+                    # 在主标签页内切换路由，失败时在同一标签页完整加载（之后 Ember 重新启动，可继续用路由）
+                    if not self.open_topic_spa(topic):
+                        logging.info("前端路由切换失败，改用完整加载")
+                        self.load_page(topic['url'], 'page_load', 10)
+                else:
+                    self.driver.execute_script("window.open('');")
+                    self.driver.switch_to.window(self.driver.window_handles[-1])
+                    self.resource_policy.apply(self.driver)
+                    self.load_page(topic['url'], 'page_load', 10)
+            except TimeoutException:
+                logging.warning(f"加载帖子超时: {article_title}")
+                raise
+            finally:
+                self.metrics.observe('phase', time.time() - browse_start_time, phase='page_load')
 
-                        except Exception as e:
-                            logging.error(f"处理帖子时发生错误: {e}")
+            # 当前帖子加载完成后，在后台标签页开始加载下一个帖子，与阅读时间重叠
+            if next_topic is not None:
+                next_handle = self.open_background_tab(next_topic['url'])
 
-                        finally:
-                            if len(self.driver.window_handles) > 1:
-                                self.driver.close()
-                                self.driver.switch_to.window(self.driver.window_handles[0])
-                            logging.info(f"已关闭第 {idx + 1}/{total_topics} 个帖子 ： {article_title}")
+            self.metrics.inc('topics_browsed')
 
-                    except Exception as e:
-                        logging.error(f"处理帖子 {idx + 1} 时发生错误: {e}")
-                        continue
+            if views_count > self.view_count:
+                logging.info(f"📈 当前帖子浏览量为{views_count} 大于设定值 {self.view_count}，🥳 开始进行点赞操作")
+                with self.metrics.timer('phase', phase='like'):
+                    self.click_like(topic_loader, topic)
 
-                if not topic_loader.has_met_requirements():
-                    logging.info("当前页面帖子已处理完，但未达到要求，将重新加载页面")
-                    topic_loader.reset_to_main_page()
+            scroll_duration = random.uniform(*self.DWELL_RANGE)
+            dwell_start_time = time.time()
+            try:
+                while time.time() - browse_start_time < scroll_duration:
+                    self.driver.execute_script(
+                        "window.scrollBy(0, window.innerHeight);"
+                    )
+                    time.sleep(1)
+            except Exception as e:
+                logging.warning(f"在滚动过程中发生错误: {e}")
+            self.metrics.observe('phase', time.time() - dwell_start_time, phase='dwell')
 
-            logging.info("所有要求已完成")
+            browse_end_time = time.time()
+            total_browse_time = browse_end_time - browse_start_time
+            topic_loader.update_progress(total_browse_time)
+            topic_loader.mark_topic(topic, 'visited')
+            self.consecutive_failures = 0
+            logging.info(f"浏览该帖子时间: {total_browse_time:.2f}秒")
 
         except Exception as e:
-            logging.error(f"click_topic 方法发生错误: {e}")
+            self.consecutive_failures += 1
+            topic_loader.mark_topic(topic, 'failed')
+            self.metrics.inc('errors', phase='topic')
+            logging.error(f"处理帖子时发生错误: {e}")
+
+        finally:
+            current = self.driver.current_window_handle
+            if current != main_handle:
+                self.driver.close()
+            self.driver.switch_to.window(main_handle)
+            self.resource_policy.collect(self.driver)
+            logging.info(f"已关闭帖子 ： {article_title}")
+
+        return next_handle
+
+    def open_topic_spa(self, topic):
+        """Open a topic through Discourse's client router in the current tab"""
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        if topic.get('id') is None:
+            return False
+        try:
+            if not self.waiter.route_to(urlparse(topic['url']).path):
+                return False
+            self.waiter.route_active('/t/', timeout=10, label='spa_route')
+            self.waiter.topic_ready(topic['id'])
+            return True
+        except (TimeoutException, WebDriverException) as e:
+            logging.warning(f"前端路由未能完成: {getattr(e, 'msg', None) or e}")
+            return False
+
+    def open_background_tab(self, url):
+        """Start loading url in a new tab without waiting for it, then return to the current tab"""
+        current = self.driver.current_window_handle
+        before = set(self.driver.window_handles)
+        self.driver.execute_script("window.open('', '_blank');")
+        opened = [h for h in self.driver.window_handles if h not in before]
+        if not opened:
+            return None
+
+        # 拦截规则按标签页生效，需要先切过去设置，再异步跳转，避免阻塞在页面加载上
+        self.driver.switch_to.window(opened[0])
+        self.resource_policy.apply(self.driver)
+        self.driver.execute_script(
+            "var url = arguments[0]; setTimeout(function () { location.href = url; }, 0);", url
+        )
+        self.driver.switch_to.window(current)
+        return opened[0]
+
+    def close_extra_tabs(self):
+        """Close every tab except the topic list, keeping the tab count bounded"""
+        handles = self.driver.window_handles
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+
+    def click_like(self, topic_loader, topic):
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        if topic_loader.is_liked(topic):
+            logging.info("该帖子已点赞，跳过点赞操作。")
+            return
 
-    def click_like(self):
         try:
-            global like_count
-            like_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable(
-                    (By.CSS_SELECTOR, ".btn-toggle-reaction-like")
-                )
+            # 只等待帖子渲染完成；渲染后没有按钮立即返回，不再等满超时
+            state = self.waiter.until(
+                lambda driver: driver.execute_script(LIKE_SCRIPT, True), 10, 'like_button'
             )
 
-            if "移除此赞" in like_button.get_attribute("title"):
+            if state == 'missing':
+                logging.info("该帖子没有点赞按钮，跳过点赞操作。")
+            elif state == 'liked':
+                topic_loader.mark_liked(topic)
                 logging.info("该帖子已点赞，跳过点赞操作。")
             else:
-                self.driver.execute_script("arguments[0].click();", like_button)
-                like_count += 1
-                logging.info("点赞帖子成功")
+                # 点击后等按钮变为已点赞状态再记录，请求失败或被限流时不会误记
+                try:
+                    self.waiter.until(
+                        lambda driver: driver.execute_script(LIKE_SCRIPT, False) == 'liked',
+                        5, 'like_confirm'
+                    )
+                except TimeoutException:
+                    self.metrics.inc('timeouts', phase='like_confirm')
+                    logging.warning("点赞未能确认，下次仍会尝试点赞该帖子")
+                else:
+                    topic_loader.mark_liked(topic)
+                    self.metrics.inc('likes')
+                    logging.info("点赞帖子成功")
 
         except TimeoutException:
-            logging.error("点赞操作失败：点赞按钮定位超时")
+            self.metrics.inc('timeouts', phase='like')
+            logging.error("点赞操作失败：帖子内容加载超时")
         except WebDriverException as e:
+            self.metrics.inc('errors', phase='like')
             logging.error(f"点赞操作失败: {e}")
         except Exception as e:
+            self.metrics.inc('errors', phase='like')
             logging.error(f"未知错误导致点赞操作失败: {e}")
-    def run(self):
-        """主运行流程"""
-        global browse_count
-        global like_count
 
-        for i in range(user_count):
-            start_time = time.time()
-            self.username = accounts[i]['username']
-            self.password = accounts[i]['password']
-            self.view_count = accounts[i]['view_count']
-            self.scroll_duration = accounts[i]['scroll_duration']
-            domain = accounts[i]['domain']
+    def run_account(self, account, index=0, prelaunch_next=False, deadline=None, next_domain=None):
+        """Browse with a single account and return its result record"""
+        if not self.config.profile:
+            return self._run_account(account, index, prelaunch_next, deadline, next_domain)
 
-            logging.info(f"▶️▶️▶️  开始执行第{i + 1}个账号: {domain} - {self.username}")
+        profiler = AccountProfiler(python=self.config.profile == 'full')
+        self.tracer = profiler.tracer
+        try:
+            with profiler:
+                record = self._run_account(account, index, prelaunch_next, deadline, next_domain)
+        finally:
+            self.tracer = None
+        record['profile'] = profiler.result()
+        return record
+
+    def _run_account(self, account, index, prelaunch_next, deadline, next_domain):
+        from selenium.common.exceptions import WebDriverException
+
+        start_time = time.time()
+        self.username = account.username
+        self.password = account.password
+        self.view_count = account.view_count
+        self.scroll_duration = account.scroll_duration
+        self.discovery = account.discovery
+        self.navigation = account.navigation
+        self.startup_time = 0
+        self.resource_policy = ResourcePolicy(account.resource_profile)
+        self.watchdog = MemoryWatchdog(self.config.memory_limit_mb, self.config.js_heap_limit_mb)
+        self.forum_url = account.forum_url
+        domain = account.domain
+        self.metrics = Metrics(domain=domain, account=self.username)
+        self.checkpoint = None
+        self.deadline = deadline
+        self.budget_exhausted = False
+        self.gave_up = None
+        self.consecutive_failures = 0
+        self.timeouts = None
+        browse_start_time = None
+        requirements, _ = daily_requirements_for(domain)
+        error = None
+        skipped = False
+
+        logging.info(f"▶️▶️▶️  开始执行第{index + 1}个账号: {domain} - {self.username}")
 
-            try:
-                if not self.create_driver():
-                    logging.error("创建浏览器实例失败，跳过当前账号")
-                    continue
+        try:
+            self.checkpoint = ProgressCheckpoint(self.config.state_db, domain, self.username)
+            self.timeouts = AdaptiveTimeouts(self.config.state_db, domain)
+            if self.circuit_reason(domain):
+                error = f"{domain} 已熔断，跳过：{self.open_circuits[domain]}"
+                logging.warning(f"⛔ {error}")
+            elif requirements_met(requirements, self.checkpoint.progress):
+                skipped = True
+                logging.info(
+                    f"⏭️ {self.username} 今日已浏览 {self.checkpoint.progress['browse_count']} 个帖子，"
+                    f"目标已完成，跳过"
+                )
+            elif not self.create_driver(domain):
+                error = "创建浏览器实例失败"
+                logging.error("创建浏览器实例失败，跳过当前账号")
+            else:
+                if prelaunch_next:
+                    self.driver_pool.prelaunch(
+                        current=self.driver, key=self.browser_cache.key(next_domain or domain)
+                    )
 
                 logging.info(f"导航到 {domain}")
-                self.driver.get(accounts[i]['forum_url'])
-
-                if not self.login():
+                with self.metrics.timer('phase', phase='login'):
+                    signed_in = self.sign_in(account.forum_url, domain)
+                if not signed_in:
+                    error = "登录失败"
+                    self.metrics.inc('errors', phase='login')
                     logging.error(f"{self.username} 登录失败")
-                    continue
-
-                self.click_topic()
-                logging.info(f"🎉 恭喜：{self.username}，帖子浏览全部完成")
+                else:
+                    browse_start_time = time.time()
+                    self.click_topic()
+                    # 浏览期间 _t 会被轮换，写回最新的 Cookie 并顺延缓存有效期
+                    if self.driver is not None:
+                        self.save_session(domain)
+                    if self.gave_up:
+                        error = self.gave_up
+                        self.metrics.inc('errors', phase='gave_up')
+                        logging.warning(f"⚠️ {self.username} 提前停止：{error}")
+                    elif not self.budget_exhausted:
+                        logging.info(f"🎉 恭喜：{self.username}，帖子浏览全部完成")
+                    self.record_history(domain, start_time, browse_start_time)
+
+        except CircuitOpenError as e:
+            # 同一域名的后续账号很可能同样失败，本次运行中直接跳过
+            error = str(e)
+            self.trip_circuit(domain, error)
+            self.metrics.inc('errors', phase='circuit_open')
+            logging.error(f"⛔ {error}，本次运行跳过 {domain} 的其他账号")
+        except WebDriverException as e:
+            # 只放弃当前账号，不影响其他账号
+            error = f"WebDriver 错误: {e.msg or e}"
+            self.metrics.inc('errors', phase='webdriver')
+            logging.error(f"WebDriver 初始化失败: {e}")
+            logging.info("请尝试重新搭建青龙面板或换个机器运行")
+        except RecycleError as e:
+            error = str(e)
+            self.metrics.inc('errors', phase='recycle')
+            logging.error(f"🧹 {error}，停止当前账号")
+        except Exception as e:
+            error = str(e)
+            self.metrics.inc('errors', phase='run')
+            logging.error(f"运行过程中出错: {e}")
+        finally:
+            if self.waiter is not None:
+                self.waiter.log_summary()
+                if self.timeouts is not None:
+                    try:
+                        self.timeouts.save(self.waiter.timings)
+                    except sqlite3.Error as e:
+                        logging.warning(f"保存延迟样本失败: {e}")
+                self.waiter = None
+            if self.timeouts is not None:
+                self.timeouts.close()
+                self.timeouts = None
+            if self.driver is not None:
+                self.watchdog.sample(self.driver)
+                self.resource_policy.collect(self.driver)
+                self.resource_policy.log_summary()
+                self.metrics.inc('blocked_requests', self.resource_policy.blocked_requests)
+                parsed = urlparse(account.forum_url)
+                self.driver_pool.release(self.driver, origins=[f"{parsed.scheme}://{parsed.netloc}"])
+                self.driver = None
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+
+        end_time = time.time()
+        spend_time = int((end_time - start_time) // 60)
+        self.metrics.observe('phase', end_time - start_time, phase='account')
+
+        return {
+            "domain": domain,
+            "username": self.username,
+            "browse_count": self.metrics.counter('topics_browsed'),
+            "like_count": self.metrics.counter('likes'),
+            "spend_time": spend_time,
+            "startup_time": round(self.startup_time, 1),
+            "blocked_requests": self.resource_policy.blocked_requests,
+            "saved_bytes": self.resource_policy.saved_bytes,
+            "peak_memory_mb": round(self.watchdog.peak_rss / MemoryWatchdog.MB),
+            "peak_js_heap_mb": round(self.watchdog.peak_js_heap / MemoryWatchdog.MB),
+            "driver_recycles": self.metrics.counter('driver_recycles'),
+            "daily_browse_count": self.checkpoint.progress['browse_count'] if self.checkpoint else 0,
+            "daily_views": requirements['daily_views'],
+            "skipped": skipped,
+            "budget_exhausted": self.budget_exhausted,
+            "gave_up": bool(self.gave_up),
+            "deferred": False,
+            "error": error,
+            "metrics": self.metrics.snapshot()
+        }
 
-                self.logout()
+    @staticmethod
+    def failed_record(account, error):
+        return {
+            "domain": account.domain,
+            "username": account.username,
+            "browse_count": 0,
+            "like_count": 0,
+            "spend_time": 0,
+            "startup_time": 0,
+            "blocked_requests": 0,
+            "saved_bytes": 0,
+            "peak_memory_mb": 0,
+            "peak_js_heap_mb": 0,
+            "driver_recycles": 0,
+            "daily_browse_count": 0,
+            "daily_views": daily_requirements_for(account.domain)[0]['daily_views'],
+            "skipped": False,
+            "budget_exhausted": False,
+            "gave_up": False,
+            "deferred": False,
+            "error": error,
+            "metrics": {}
+        }
 
-            except WebDriverException as e:
-                logging.error(f"WebDriver 初始化失败: {e}")
-                logging.info("请尝试重新搭建青龙面板或换个机器运行")
-                exit(1)
-            except Exception as e:
-                logging.error(f"运行过程中出错: {e}")
+    def circuit_reason(self, domain):
+        """Why domain's breaker is open in this run (possibly tripped by another process), else None"""
+        if domain not in self.open_circuits:
+            try:
+                circuits = OpenCircuits(self.config.state_db, self.run_id)
+                try:
+                    reason = circuits.get(domain)
+                finally:
+                    circuits.close()
+            except sqlite3.Error as e:
+                logging.warning(f"读取熔断状态失败: {e}")
+                reason = None
+            if reason:
+                self.open_circuits[domain] = reason
+        return self.open_circuits.get(domain)
+
+    def trip_circuit(self, domain, reason):
+        self.open_circuits[domain] = reason
+        try:
+            circuits = OpenCircuits(self.config.state_db, self.run_id)
+            try:
+                circuits.open(domain, reason)
             finally:
-                if self.driver is not None:
-                    self.driver.quit()
-
-            end_time = time.time()
-            spend_time = int((end_time - start_time) // 60)
-
-            account_info.append({
-                "domain": domain,
-                "username": self.username,
-                "browse_count": browse_count,
-                "like_count": like_count,
-                "spend_time": spend_time
-            })
+                circuits.close()
+        except sqlite3.Error as e:
+            logging.warning(f"保存熔断状态失败: {e}")
+
+    def record_history(self, domain, start_time, browse_start_time):
+        """Feed this account's per-topic latency into the scheduler's estimates"""
+        topics = self.metrics.counter('topics_browsed')
+        if not topics:
+            return
+        try:
+            history = RunHistory(self.config.state_db)
+            try:
+                history.record(
+                    domain,
+                    (time.time() - browse_start_time) / topics,
+                    browse_start_time - start_time
+                )
+            finally:
+                history.close()
+        except sqlite3.Error as e:
+            logging.warning(f"保存运行历史失败: {e}")
 
-            # 重置状态
-            browse_count = 0
-            like_count = 0
+    @classmethod
+    def deferred_record(cls, entry):
+        record = cls.failed_record(entry.account, None)
+        record['deferred'] = True
+        record['estimate_minutes'] = round(entry.estimate / 60, 1)
+        return record
+
+    def run(self):
+        """主运行流程"""
+        accounts = self.config.accounts
+        workers = min(self.config.max_workers, len(accounts))
+        scheduled, deferred = schedule_accounts(self.config, workers)
+        for entry in deferred:
+            logging.info(
+                f"⏸️ {entry.account.domain} - {entry.account.username} 预计需要 "
+                f"{entry.estimate / 60:.1f} 分钟，超出运行时间窗口，推迟到下次运行"
+            )
 
+        if workers > 1:
+            account_info = self.run_concurrently(workers, scheduled)
+        else:
+            account_info = []
+            try:
+                for i, entry in enumerate(scheduled):
+                    has_next = i + 1 < len(scheduled)
+                    account_info.append(self.run_account(
+                        entry.account, entry.index,
+                        prelaunch_next=self.config.driver_prelaunch and has_next,
+                        deadline=entry.deadline,
+                        next_domain=scheduled[i + 1].account.domain if has_next else None
+                    ))
+            finally:
+                self.driver_pool.close()
+        account_info.extend(self.deferred_record(entry) for entry in deferred)
+
+        self.write_metrics(account_info)
+        if self.config.profile:
+            self.write_profile(account_info)
+        self.report(account_info)
+
+    def run_queue(self, queue):
+        """Worker mode: claim accounts from the shared queue until none are left"""
+        logging.info(f"📬 队列模式：{queue.worker_id} 从 {queue.db_path} 领取任务")
+        deadline = run_deadline(self.config, time.time())
+        account_info = []
+        try:
+            while deadline is None or time.time() < deadline:
+                # 已熔断的域名不再领取，留给其他节点
+                skip_domains = sorted(self.open_circuits)
+                account = queue.claim(skip_domains)
+                if account is None:
+                    retry_at = queue.next_retry(skip_domains)
+                    if retry_at is not None and (deadline is None or retry_at < deadline):
+                        logging.info(f"⏳ 失败的任务 {max(0, retry_at - time.time()):.0f} 秒后才能重试，等待中")
+                        time.sleep(max(0, retry_at - time.time()))
+                        continue
+                    logging.info("📭 队列中没有可领取的任务")
+                    break
+                if self.circuit_reason(account.domain):
+                    # 领取后才发现该域名已熔断：不算一次尝试，交还给其他节点
+                    queue.release(account)
+                    continue
+                with queue.lease(account):
+                    record = self.run_account(account, len(account_info), deadline=deadline)
+                queue.complete(account, record)
+                account_info.append(record)
+        finally:
+            self.driver_pool.close()
+
+        self.write_metrics(account_info)
+        if self.config.profile:
+            self.write_profile(account_info)
+        self.report(account_info)
+
+    def write_metrics(self, account_info):
+        metrics_dir = self.config.metrics_dir
+        if not metrics_dir:
+            return
+        run_metrics = Metrics()
+        for info in account_info:
+            run_metrics.merge(info.get('metrics', {}))
+            if info.get('error'):
+                run_metrics.inc('accounts_failed', domain=info['domain'], account=info['username'])
+        try:
+            run_metrics.write(metrics_dir)
+            logging.info(f"📈 性能指标已写入 {metrics_dir}/")
+        except OSError as e:
+            logging.warning(f"写入性能指标失败: {e}")
+
+    def write_profile(self, account_info):
+        directory = self.config.metrics_dir or '.'
+        report_path = path.join(directory, 'profile.txt')
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.write(format_profile_report(account_info))
+        except OSError as e:
+            logging.warning(f"写入性能剖析报告失败: {e}")
+            return
+
+        rows = [row for info in account_info for row in (info.get('profile') or {}).get('commands', [])]
+        logging.info("🔬 WebDriver 命令耗时前 10：")
+        for row in sorted(rows, key=lambda row: row['total'], reverse=True)[:10]:
+            logging.info(f"   {row['caller']} {row['command']}：{row['count']} 次，共 {row['total']:.2f} 秒")
+        logging.info(f"🔬 性能剖析报告已写入 {report_path}")
+
+    def run_concurrently(self, workers, scheduled):
+        """Run each account in its own worker process and collect the records in order"""
+        logging.info(f"🚀 并发模式：{workers} 个进程同时执行 {len(scheduled)} 个账号")
+        pool_kwargs = {'max_workers': workers}
+        if sys.version_info >= (3, 11):
+            # 每个进程只跑一个账号，保证状态完全隔离
+            pool_kwargs['max_tasks_per_child'] = 1
+
+        account_info = []
+        with ProcessPoolExecutor(**pool_kwargs) as executor:
+            # 按计划的开始顺序提交，进程池按空闲顺序取任务，与调度时的模拟一致
+            futures = [
+                executor.submit(
+                    run_account_in_worker, self.config, entry.account, entry.index, entry.deadline, self.run_id
+                )
+                for entry in scheduled
+            ]
+            for entry, future in zip(scheduled, futures):
+                account = entry.account
+                try:
+                    account_info.append(future.result())
+                except (Exception, SystemExit) as e:
+                    # 工作进程崩溃只记录该账号失败
+                    logging.error(f"账号 {account.domain} - {account.username} 的工作进程异常: {e!r}")
+                    account_info.append(self.failed_record(account, f"工作进程异常: {e!r}"))
+        return account_info
+
+    def report(self, account_info):
         logging.info("\n" + "="*50)
         logging.info("📊 执行报告")
         logging.info("="*50)
 
         total_browse = sum(r['browse_count'] for r in account_info)
         total_like = sum(r['like_count'] for r in account_info)
+        failed = [r for r in account_info if r.get('error')]
+        skipped = [r for r in account_info if r.get('skipped')]
+        deferred = [r for r in account_info if r.get('deferred')]
 
         # 生成摘要
         summary = f"运行完成\n\n"
         summary += f"总浏览: {total_browse} 个帖子\n"
-        summary += f"总点赞: {total_like} 次\n\n"
+        summary += f"总点赞: {total_like} 次\n"
+        if failed:
+            summary += f"失败账号: {len(failed)} 个\n"
+        if skipped:
+            summary += f"今日已完成: {len(skipped)} 个账号\n"
+        if deferred:
+            summary += f"推迟到下次: {len(deferred)} 个账号\n"
+        summary += "\n"
 
         for info in account_info:
             summary += f"{info['domain']} - {info['username']}\n"
-            summary += f"浏览: {info['browse_count']} | 点赞: {info['like_count']} | 用时: {info['spend_time']}分钟\n\n"
+            if info['skipped']:
+                summary += f"今日目标已完成（{info['daily_browse_count']}/{info['daily_views']}），跳过\n\n"
+                logging.info(f"⏭️ {info['domain']} - {info['username']}")
+                logging.info(f"   今日目标已完成（{info['daily_browse_count']}/{info['daily_views']}），跳过")
+                continue
+            if info['deferred']:
+                summary += f"预计需要 {info['estimate_minutes']} 分钟，超出运行时间窗口，推迟到下次运行\n\n"
+                logging.info(f"⏸️ {info['domain']} - {info['username']}")
+                logging.info(f"   预计需要 {info['estimate_minutes']} 分钟，超出运行时间窗口，推迟到下次运行")
+                continue
+            summary += f"浏览: {info['browse_count']} | 点赞: {info['like_count']} | 用时: {info['spend_time']}分钟 | 启动: {info['startup_time']}秒\n"
+            summary += f"今日累计: {info['daily_browse_count']}/{info['daily_views']} 个帖子\n"
+            if info['budget_exhausted']:
+                summary += "时间预算用完，剩余进度留到下次运行\n"
+            if info['blocked_requests']:
+                summary += f"拦截: {info['blocked_requests']} 个请求 | 约节省: {info['saved_bytes'] / 1024 / 1024:.1f}MB\n"
+            if info['peak_memory_mb'] or info['peak_js_heap_mb']:
+                summary += f"内存峰值: {info['peak_memory_mb']}MB | JS 堆: {info['peak_js_heap_mb']}MB | 更换浏览器: {info['driver_recycles']} 次\n"
+            if info.get('error'):
+                summary += f"失败原因: {info['error']}\n"
+            summary += "\n"
             # 控制台输出
-            logging.info(f"✅ {info['domain']} - {info['username']}")
-            logging.info(f"   浏览:{info['browse_count']} 点赞:{info['like_count']} 用时:{info['spend_time']}分钟")
+            status = "⚠️" if info.get('gave_up') else "❌" if info.get('error') else "✅"
+            logging.info(f"{status} {info['domain']} - {info['username']}")
+            logging.info(f"   浏览:{info['browse_count']} 点赞:{info['like_count']} 用时:{info['spend_time']}分钟 启动:{info['startup_time']}秒")
+            logging.info(f"   今日累计:{info['daily_browse_count']}/{info['daily_views']}个帖子")
+            if info['budget_exhausted']:
+                logging.info("   时间预算用完，剩余进度留到下次运行")
+            if info['blocked_requests']:
+                logging.info(f"   拦截:{info['blocked_requests']}个请求 约节省:{info['saved_bytes'] / 1024 / 1024:.1f}MB")
+            if info['peak_memory_mb'] or info['peak_js_heap_mb']:
+                logging.info(f"   内存峰值:{info['peak_memory_mb']}MB JS堆:{info['peak_js_heap_mb']}MB 更换浏览器:{info['driver_recycles']}次")
+            if info.get('error'):
+                logging.info(f"   失败原因:{info['error']}")
 
         logging.info("-" * 50)
         logging.info(f"📚 总浏览: {total_browse} 个帖子")
@@ -586,13 +3303,157 @@ class LinuxDoBrowser:
             logging.info("📤 未配置通知推送")
 
 
-if __name__ == "__main__":
+def run_account_in_worker(config, account, index, deadline=None, run_id=None):
+    """Process-pool entry point: a fresh browser object per account"""
+    setup_logging()
+    browser = LinuxDoBrowser(config, run_id=run_id)
+    try:
+        return browser.run_account(account, index, deadline=deadline)
+    finally:
+        browser.driver_pool.close()
+
+
+def log_config(config):
+    if config.accounts:
+        logging.info(f"✅ 成功解析 {len(config.accounts)} 个账户配置")
+        for acc in config.accounts:
+            logging.info(f"   📍 {acc.domain} - {acc.username}")
+    for error in config.errors:
+        logging.error(f"❌ {error}")
+
+
+def print_plan(config):
+    """Print the planned per-account work without starting a browser"""
+    logging.info("🗓️ 执行计划：")
+    logging.info(
+        f"   并发进程数：{min(config.max_workers, len(config.accounts))}，"
+        f"浏览器复用次数：{config.driver_max_uses}，"
+        f"预启动：{'开' if config.driver_prelaunch else '关'}，"
+        f"帖子预加载：{'开' if config.topic_prefetch else '关'}，"
+        f"内存上限：{config.memory_limit_mb or '不限'}MB / JS 堆 {config.js_heap_limit_mb or '不限'}MB"
+    )
+    for i, acc in enumerate(config.accounts):
+        requirements, configured = daily_requirements_for(acc.domain)
+        source = "daily_requirements.json" if configured else "默认值"
+        logging.info(f"   {i + 1}. {acc.domain} - {acc.username}（{acc.env_name}）")
+        logging.info(
+            f"      目标：浏览 {requirements['daily_views']} 个帖子，阅读 {requirements['daily_time']} 秒（{source}）"
+        )
+        logging.info(
+            f"      点赞阈值：{acc.view_count}，发现方式：{acc.discovery}，"
+            f"最长滚动：{acc.scroll_duration} 秒，资源拦截：{acc.resource_profile}，导航方式：{acc.navigation}"
+        )
+
+    workers = min(config.max_workers, len(config.accounts))
+    now = time.time()
+    deadline = run_deadline(config, now)
+    if deadline is None:
+        return
+    scheduled, deferred = schedule_accounts(config, workers, now, read_only=True)
+    logging.info(f"⏰ 运行截止：{time.strftime('%H:%M', time.localtime(deadline))}，执行顺序：")
+    for entry in scheduled:
+        note = "（只够完成一部分）" if entry.partial else ""
+        logging.info(
+            f"   {entry.account.domain} - {entry.account.username}："
+            f"预计 {entry.estimate / 60:.1f} 分钟，"
+            f"第 {(entry.start - now) / 60:.0f} 分钟开始{note}"
+        )
+    for entry in deferred:
+        logging.info(
+            f"   ⏸️ {entry.account.domain} - {entry.account.username}："
+            f"预计 {entry.estimate / 60:.1f} 分钟，超出窗口，推迟"
+        )
+
+
+def print_queue_status(queue):
+    rows = queue.status()
+    if not rows:
+        logging.info("📭 队列为空")
+        return
+    now = time.time()
+    logging.info(f"📬 队列 {queue.db_path}：")
+    for day, domain, username, status, attempts, worker, lease_expires, not_before, result in rows:
+        line = f"   {day} {domain} - {username}：{status}（第 {attempts} 次）"
+        if status == 'leased':
+            line += f"，{worker} 持有，租约剩余 {lease_expires - now:.0f} 秒"
+        elif status == 'pending' and not_before and not_before > now:
+            line += f"，{not_before - now:.0f} 秒后可重试"
+        if result:
+            result = json.loads(result)
+            if result.get('error'):
+                line += f"，失败原因：{result['error']}"
+            elif 'browse_count' in result:
+                line += f"，浏览 {result['browse_count']} 个帖子，点赞 {result['like_count']} 次"
+        logging.info(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="DiscourseAlive：模拟 Discourse 论坛日常浏览和点赞")
+    parser.add_argument('--check', action='store_true', help='只校验配置，不启动浏览器')
+    parser.add_argument('--plan', action='store_true', help='校验配置并打印每个账户的计划，不启动浏览器')
+    parser.add_argument('--profile', nargs='?', const='commands', choices=('commands', 'full'),
+                        help='统计每个 WebDriver 命令的次数和耗时（full 同时启用 cProfile 和 tracemalloc），'
+                             '报告写入 METRICS_DIR/profile.txt')
+    queue = parser.add_argument_group('多机任务队列（需设置 WORK_QUEUE）')
+    queue.add_argument('--enqueue', action='store_true', help='把本机配置的账户加入今天的任务队列')
+    queue.add_argument('--worker', action='store_true', help='从任务队列领取账户执行，直到队列为空')
+    queue.add_argument('--queue-status', action='store_true', help='查看任务队列中各账户的状态和结果')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+    start_time = time.time()
+
+    config = load_config()
+    if args.profile:
+        config = replace(config, profile=args.profile)
+    log_config(config)
+
+    if args.check or args.plan:
+        if args.plan and config.accounts:
+            print_plan(config)
+        elapsed = (time.time() - start_time) * 1000
+        status = "配置有误" if config.errors else "配置有效"
+        logging.info(f"{'❌' if config.errors else '✅'} {status}（{elapsed:.0f} 毫秒）")
+        return 1 if config.errors else 0
+
+    # 配置有误时不回退默认值继续运行（例如点赞阈值写错会悄悄变成 1000），只允许查看队列状态
+    if config.errors and (args.enqueue or args.worker or not args.queue_status):
+        logging.error("❌ 配置有误，未开始运行，请先修正上面的错误（可用 --check 检查）")
+        return 1
+
+    if args.enqueue or args.worker or args.queue_status:
+        if not config.work_queue:
+            logging.error("❌ 请先设置 WORK_QUEUE（共享的队列文件路径）")
+            return 1
+        queue = WorkQueue(config.work_queue, config.queue_lease_seconds)
+        if args.enqueue:
+            added = queue.enqueue(config.accounts)
+            logging.info(f"📬 已加入 {added} 个任务（{len(config.accounts) - added} 个今天已在队列中）")
+        if args.queue_status:
+            print_queue_status(queue)
+        if not args.worker:
+            return 0
+
+    if not config.accounts and not args.worker:
+        return 1
+
     try:
-        linuxdo_browser = LinuxDoBrowser()
-        linuxdo_browser.run()
+        linuxdo_browser = LinuxDoBrowser(config, worker=args.worker)
+        if args.worker:
+            linuxdo_browser.run_queue(queue)
+        else:
+            linuxdo_browser.run()
     except KeyboardInterrupt:
         logging.info("\n⏹️ 用户中断执行")
     except Exception as e:
         logging.error(f"❌ 程序异常: {e}")
     finally:
-        logging.info("🏁 程序结束")
\ No newline at end of file
+        logging.info("🏁 程序结束")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,486 @@
+# -*- coding: utf-8 -*-
+"""
+离线基准测试：启动一个本地的 Discourse 仿真站点，用真实的浏览流程（headless Chrome）跑一遍，
+统计每分钟浏览帖子数、各阶段耗时和内存峰值，并可与之前的结果对比检查性能回退。
+
+    python benchmark.py --topics 300 --views 20 --latency-ms 50
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json
+"""
+import argparse
+import html
+import importlib
+import json
+import logging
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PAGE_SIZE = 30
+
+
+class MockForum:
+    """In-memory forum state shared by all request handlers"""
+
+    def __init__(self, topics=300, pinned=3, latency=0.0, no_like_every=7):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.sessions = set()
+        self.likes = set()
+        self.topics = []
+        for i in range(topics):
+            topic_id = 1000 + i
+            self.topics.append({
+                'id': topic_id,
+                'slug': f'topic-{topic_id}',
+                'title': f'Benchmark topic {topic_id}',
+                # 浏览量跨越常见阈值，一部分帖子会触发点赞
+                'views': (i * 7919) % 5000,
+                'pinned': i < pinned,
+                'likeable': no_like_every <= 0 or i % no_like_every != 0,
+            })
+        self.by_id = {t['id']: t for t in self.topics}
+
+    def page(self, number):
+        return self.topics[number * PAGE_SIZE:(number + 1) * PAGE_SIZE]
+
+    def has_more(self, number):
+        return (number + 1) * PAGE_SIZE < len(self.topics)
+
+
+LIST_ROW = (
+    '<tr class="topic-list-item" data-topic-id="{id}">'
+    '<td class="main-link"><span class="topic-statuses">{pinned}</span>'
+    '<a class="title raw-link" href="/t/{slug}/{id}">{title}</a></td>'
+    '<td class="num views"><span class="number" title="This topic has been viewed {views} times">{short}</span></td>'
+    '</tr>'
+)
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Mock Discourse</title>
+<style>
+  body {{ font-family: sans-serif; }}
+  .topic-body {{ height: 600px; border-bottom: 1px solid #ddd; }}
+  .modal {{ display: none; }}
+  .modal.open {{ display: block; }}
+</style></head>
+<body>
+<header class="d-header">{header}</header>
+<div id="main-outlet">{body}</div>
+<script>
+function request(method, url, body) {{
+  return fetch(url, {{method: method, body: body, credentials: 'same-origin',
+                      headers: {{'Content-Type': 'application/x-www-form-urlencoded'}}}});
+}}
+{common}
+</script>
+<script class="page-script">
+{script}
+</script>
+</body></html>
+"""
+
+LOGIN_HEADER = """
+<button class="btn login-button" onclick="document.getElementById('login-modal').classList.add('open')">
+  <span class="d-button-label">Log In</span>
+</button>
+<div id="login-modal" class="modal">
+  <form id="login-form" onsubmit="return false;">
+    <input id="login-account-name" type="text">
+    <input id="login-account-password" type="password">
+    <div id="modal-alert"></div>
+    <button id="login-button" type="button" onclick="submitLogin()">Log In</button>
+  </form>
+</div>
+"""
+
+LOGIN_SCRIPT = """
+function submitLogin() {
+  var body = 'login=' + encodeURIComponent(document.getElementById('login-account-name').value) +
+             '&password=' + encodeURIComponent(document.getElementById('login-account-password').value);
+  request('POST', '/session', body).then(function (r) {
+    if (r.ok) { location.reload(); return; }
+    var alert = document.getElementById('modal-alert');
+    alert.className = 'alert-error';
+    alert.textContent = 'Incorrect username or password';
+  });
+}
+"""
+
+# 前端路由每次回到列表都会重新执行本脚本：只重置分页状态，滚动监听只注册一次，
+# 旧列表尚未返回的请求按 listVersion 丢弃
+LIST_SCRIPT = """
+var nextPage = 1, loadingMore = false, exhausted = false;
+var listVersion = (typeof listVersion === 'number' ? listVersion : 0) + 1;
+function shortCount(n) { return n >= 1000 ? (n / 1000).toFixed(1) + 'k' : String(n); }
+function loadMoreTopics() {
+  if (loadingMore || exhausted || !document.getElementById('list-area')) return;
+  if (window.innerHeight + window.scrollY < document.body.scrollHeight - 200) return;
+  var version = listVersion;
+  loadingMore = true;
+  document.querySelector('.topic-list-bottom .spinner').style.display = 'block';
+  fetch('/latest.json?page=' + nextPage, {credentials: 'same-origin'}).then(function (r) { return r.json(); })
+    .then(function (data) {
+      if (version !== listVersion) return;
+      var tbody = document.querySelector('#list-area tbody');
+      data.topic_list.topics.forEach(function (t) {
+        var tr = document.createElement('tr');
+        tr.className = 'topic-list-item';
+        tr.setAttribute('data-topic-id', t.id);
+        tr.innerHTML = '<td class="main-link"><span class="topic-statuses">' +
+          (t.pinned ? '<span class="pinned"></span>' : '') + '</span>' +
+          '<a class="title raw-link" href="/t/' + t.slug + '/' + t.id + '"></a></td>' +
+          '<td class="num views"><span class="number" title="This topic has been viewed ' + t.views +
+          ' times">' + shortCount(t.views) + '</span></td>';
+        tr.querySelector('a.title').textContent = t.title;
+        tbody.appendChild(tr);
+      });
+      exhausted = !data.topic_list.more_topics_url;
+      nextPage += 1;
+    })
+    .finally(function () {
+      if (version !== listVersion) return;
+      loadingMore = false;
+      document.querySelector('.topic-list-bottom .spinner').style.display = 'none';
+    });
+}
+if (!window.listScrollInstalled) {
+  window.listScrollInstalled = true;
+  window.addEventListener('scroll', function () { loadMoreTopics(); });
+}
+"""
+
+# 仿照 Discourse 的前端路由（require('discourse/lib/url').default.routeTo），供 NAVIGATION=spa 使用：
+# 取回目标页面后只替换 #main-outlet 并执行该页面自己的脚本，不重新加载整个文档
+ROUTER_SCRIPT = """
+window.require = function (name) {
+  if (name !== 'discourse/lib/url') throw new Error('Could not find module ' + name);
+  return {default: {routeTo: function (path) {
+    fetch(path, {credentials: 'same-origin'}).then(function (r) { return r.text(); }).then(function (text) {
+      var doc = new DOMParser().parseFromString(text, 'text/html');
+      document.getElementById('main-outlet').innerHTML = doc.getElementById('main-outlet').innerHTML;
+      history.pushState({}, '', path);
+      window.scrollTo(0, 0);
+      var script = document.createElement('script');
+      script.textContent = doc.querySelector('script.page-script').textContent;
+      document.body.appendChild(script);
+    });
+  }}};
+};
+"""
+
+TOPIC_SCRIPT = """
+function toggleLike(button) {
+  request('POST', '/like/' + button.getAttribute('data-topic-id')).then(function (r) {
+    if (r.ok) button.classList.toggle('has-like');
+  });
+}
+"""
+
+
+def short_count(views):
+    return f"{views / 1000:.1f}k" if views >= 1000 else str(views)
+
+
+def make_handler(forum):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _session(self):
+            cookie = SimpleCookie(self.headers.get('Cookie', ''))
+            token = cookie['_t'].value if '_t' in cookie else None
+            return token if token in forum.sessions else None
+
+        def _send(self, status, body, content_type='text/html; charset=utf-8', headers=()):
+            if forum.latency:
+                time.sleep(forum.latency)
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _page(self, body, script=''):
+            # 路由和登录脚本只在整页加载时执行一次，前端路由只重新执行页面自己的脚本
+            common = ROUTER_SCRIPT
+            if self._session():
+                header = '<a id="current-user" href="/u/me">me</a>'
+            else:
+                header = LOGIN_HEADER
+                common += LOGIN_SCRIPT
+            return PAGE_TEMPLATE.format(header=header, body=body, common=common, script=script)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [p for p in url.path.split('/') if p]
+            if url.path in ('/', '/latest'):
+                return self._list_page()
+            if url.path == '/latest.json':
+                page = int(parse_qs(url.query).get('page', ['0'])[0])
+                return self._latest_json(page)
+            if len(parts) >= 2 and parts[0] == 't' and parts[-1].isdigit():
+                return self._topic_page(int(parts[-1]))
+            self._send(404, 'not found', 'text/plain')
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0) or 0)
+            form = parse_qs(self.rfile.read(length).decode('utf-8'))
+            if self.path == '/session':
+                if form.get('login') and form.get('password'):
+                    token = secrets.token_hex(16)
+                    with forum.lock:
+                        forum.sessions.add(token)
+                    return self._send(200, '{}', 'application/json',
+                                      [('Set-Cookie', f'_t={token}; Path=/; HttpOnly')])
+                return self._send(403, '{}', 'application/json')
+            if self.path.startswith('/like/') and self._session():
+                topic_id = int(self.path.rsplit('/', 1)[-1])
+                with forum.lock:
+                    forum.likes.symmetric_difference_update({topic_id})
+                return self._send(200, '{}', 'application/json')
+            self._send(403, '{}', 'application/json')
+
+        def _list_page(self):
+            rows = ''.join(
+                LIST_ROW.format(
+                    id=t['id'], slug=t['slug'], title=html.escape(t['title']), views=t['views'],
+                    short=short_count(t['views']),
+                    pinned='<span class="pinned"></span>' if t['pinned'] else '',
+                )
+                for t in forum.page(0)
+            )
+            body = (
+                '<div id="list-area"><table class="topic-list"><tbody>' + rows + '</tbody></table>'
+                '<div class="topic-list-bottom"><div class="spinner" style="display:none">loading</div></div>'
+                '</div>'
+            )
+            self._send(200, self._page(body, LIST_SCRIPT))
+
+        def _latest_json(self, page):
+            topics = [
+                {
+                    'id': t['id'], 'slug': t['slug'], 'title': t['title'], 'views': t['views'],
+                    'pinned': t['pinned'], 'highest_post_number': 5, 'last_read_post_number': None,
+                    'unseen': True,
+                }
+                for t in forum.page(page)
+            ]
+            topic_list = {'topics': topics}
+            if forum.has_more(page):
+                topic_list['more_topics_url'] = f'/latest?page={page + 1}'
+            self._send(200, json.dumps({'topic_list': topic_list}), 'application/json')
+
+        def _topic_page(self, topic_id):
+            topic = forum.by_id.get(topic_id)
+            if topic is None:
+                return self._send(404, 'not found', 'text/plain')
+            like = ''
+            if topic['likeable'] and self._session():
+                liked = ' has-like' if topic_id in forum.likes else ''
+                like = (
+                    f'<button class="btn-toggle-reaction-like{liked}" data-topic-id="{topic_id}" '
+                    f'title="like this post" onclick="toggleLike(this)">♥</button>'
+                )
+            posts = ''.join(
+                f'<article class="topic-post" id="post_{n}"><div class="topic-body">'
+                f'<p>Post {n} of {html.escape(topic["title"])}</p>{like if n == 1 else ""}</div></article>'
+                for n in range(1, 6)
+            )
+            body = f'<div id="topic" data-topic-id="{topic_id}"><h1>{html.escape(topic["title"])}</h1>{posts}</div>'
+            self._send(200, self._page(body, TOPIC_SCRIPT))
+
+    return Handler
+
+
+def start_server(forum):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(forum))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class MemorySampler:
+    """Sample the RSS of this process and every Chrome it spawned, keeping the peak"""
+
+    def __init__(self, tree_rss, interval=0.5):
+        self.tree_rss = tree_rss
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.tree_rss(os.getpid()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def histogram_quantile(histogram, buckets, q):
+    """Upper bound of the bucket holding the q-quantile, like Prometheus without interpolation"""
+    if not histogram['count']:
+        return None
+    rank = q * histogram['count']
+    for bound, count in zip(buckets, histogram['buckets']):
+        if count >= rank:
+            return bound
+    return float('inf')
+
+
+def summarize(records, elapsed, peak_rss, buckets):
+    phases = {}
+    for record in records:
+        for item in record.get('metrics', {}).get('histograms', []):
+            if item['name'] != 'phase':
+                continue
+            phase = item['labels'].get('phase')
+            merged = phases.setdefault(phase, {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+            merged['buckets'] = [a + b for a, b in zip(merged['buckets'], item['buckets'])]
+            merged['sum'] += item['sum']
+            merged['count'] += item['count']
+
+    topics = sum(r['browse_count'] for r in records)
+    return {
+        'elapsed_seconds': round(elapsed, 2),
+        'topics': topics,
+        'likes': sum(r['like_count'] for r in records),
+        'topics_per_minute': round(topics / (elapsed / 60), 2) if elapsed else 0,
+        'peak_rss_mb': round(peak_rss / 1024 / 1024, 1),
+        'errors': [r['error'] for r in records if r.get('error')],
+        'phases': {
+            phase: {
+                'count': h['count'],
+                'mean': round(h['sum'] / h['count'], 3) if h['count'] else None,
+                'p50': histogram_quantile(h, buckets, 0.5),
+                'p95': histogram_quantile(h, buckets, 0.95),
+            }
+            for phase, h in sorted(phases.items())
+        },
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Return the list of regressions beyond tolerance (a fraction) against a previous result"""
+    regressions = []
+    if result['topics_per_minute'] < baseline['topics_per_minute'] * (1 - tolerance):
+        regressions.append(
+            f"topics_per_minute {baseline['topics_per_minute']} -> {result['topics_per_minute']}"
+        )
+    for phase, stats in result['phases'].items():
+        before = baseline.get('phases', {}).get(phase)
+        if not before or before['mean'] is None or stats['mean'] is None:
+            continue
+        if stats['mean'] > before['mean'] * (1 + tolerance) and stats['mean'] - before['mean'] > 0.05:
+            regressions.append(f"{phase} mean {before['mean']}s -> {stats['mean']}s")
+    if baseline.get('peak_rss_mb') and result['peak_rss_mb'] > baseline['peak_rss_mb'] * (1 + tolerance):
+        regressions.append(f"peak_rss_mb {baseline['peak_rss_mb']} -> {result['peak_rss_mb']}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="DiscourseAlive 离线基准测试")
+    parser.add_argument('--topics', type=int, default=300, help='列表中的帖子总数')
+    parser.add_argument('--pinned', type=int, default=3, help='置顶帖子数')
+    parser.add_argument('--latency-ms', type=float, default=0, help='每个请求的服务端延迟（毫秒）')
+    parser.add_argument('--accounts', type=int, default=1, help='依次运行的账户数')
+    parser.add_argument('--views', type=int, default=20, help='每个账户的浏览目标')
+    parser.add_argument('--dwell', type=float, default=0.5, help='每个帖子的停留时间（秒）')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='传给 app.py 的额外环境变量，例如 --env DISCOVERY=scroll')
+    parser.add_argument('--output', help='将结果写入 JSON 文件')
+    parser.add_argument('--baseline', help='与之前的结果对比，出现回退时以非零状态退出')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='允许的回退比例（默认 15%%）')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # 之后会切换到临时目录，先把用户给出的路径转换为绝对路径
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    forum = MockForum(topics=args.topics, pinned=args.pinned, latency=args.latency_ms / 1000)
+    server = start_server(forum)
+    host = f"127.0.0.1:{server.server_address[1]}"
+
+    workdir = tempfile.mkdtemp(prefix='discourse-alive-bench-')
+    with open(os.path.join(workdir, 'daily_requirements.json'), 'w', encoding='utf-8') as f:
+        json.dump({host: {'daily_views': args.views, 'daily_time': 0}}, f)
+
+    os.environ.update({
+        'DISCOURSE_USER': f"http://{host} bench bench-password",
+        'STATE_DB': os.path.join(workdir, 'state.db'),
+        'SESSION_CACHE_DIR': os.path.join(workdir, 'sessions'),
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+    })
+    for i in range(1, args.accounts):
+        os.environ[f'DISCOURSE_USER_{i}'] = f"http://{host} bench{i} bench-password"
+    for item in args.env:
+        key, _, value = item.partition('=')
+        os.environ[key] = value
+
+    # app.py 从环境变量和当前目录下的 daily_requirements.json 读取配置
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(workdir)
+    app = importlib.import_module('app')
+    app.setup_logging()
+    app.LinuxDoBrowser.DWELL_RANGE = (args.dwell, args.dwell)
+    config = app.load_config()
+    if config.errors:
+        for error in config.errors:
+            logging.error(f"❌ {error}")
+        return 1
+
+    logging.info(f"🧪 基准测试：{host}，{args.topics} 个帖子，延迟 {args.latency_ms}ms，{args.accounts} 个账户")
+    browser = app.LinuxDoBrowser(config)
+    records = []
+    start_time = time.time()
+    with MemorySampler(app.process_tree_rss) as sampler:
+        try:
+            for i, account in enumerate(config.accounts):
+                records.append(browser.run_account(account, i, prelaunch_next=i + 1 < len(config.accounts)))
+        finally:
+            browser.driver_pool.close()
+    elapsed = time.time() - start_time
+    server.shutdown()
+
+    result = summarize(records, elapsed, sampler.peak, app.Metrics.BUCKETS)
+    result['config'] = vars(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            for line in regressions:
+                logging.error(f"📉 性能回退：{line}")
+            return 1
+        logging.info("✅ 与基线相比没有性能回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())